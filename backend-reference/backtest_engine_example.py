@@ -14,17 +14,37 @@ This example demonstrates:
 
 Usage:
     python backtest_engine_example.py
+
+Live / paper trading (one bar at a time, same strategy and risk code):
+    engine = BacktestEngine(SMAStrategy(10, 30), risk_params=params, verbose=False)
+    for bar in feed:
+        signal = engine.on_bar(bar)
+    results = engine.finish()
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from array import array
+from collections import deque
 from datetime import datetime, timedelta
 from risk_management import RiskManager, Position, Bar
+from exit_book import ExitBook
+import engine_kernel
+import indicators
 import random
+import uuid
+
+
+def new_backtest_id() -> str:
+    """Unique backtest id: bt_<timestamp>_<random> (timestamp alone collides within a second)"""
+    return f'bt_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:12]}'
 
 
 class Strategy:
     """Base strategy class - implement your own strategies by inheriting"""
 
+    def __init__(self):
+        self.reset()
+
     def generate_signal(self, bars: List[Bar], current_index: int) -> str:
         """
         Generate trading signal based on historical data
@@ -38,13 +58,137 @@ class Strategy:
         """
         raise NotImplementedError
 
+    def signals(self, bars: List[Bar]) -> List[str]:
+        """
+        Signals for every bar in one pass (what run() asks generate_signal for)
+
+        Lets several engines that differ only in risk settings share one
+        signal series (see batch.py).
+        """
+        self.prepare(bars)
+        return [self.generate_signal(bars, i) for i in range(len(bars))]
+
+    def prepare(self, bars: List[Bar]) -> None:
+        """
+        Called before a full pass of generate_signal over `bars` (run, signals)
+
+        Strategies that memoize per-series work drop it here, since the same
+        list object may hold different bars than on the previous pass.
+        """
+
+    def on_bar(self, bar: Bar) -> str:
+        """
+        Generate the signal for the next bar of a live feed
+
+        The default keeps the history and calls generate_signal, so any
+        strategy works live; override with incremental state when
+        generate_signal re-scans history.
+
+        Args:
+            bar: Newest bar
+
+        Returns:
+            'buy', 'sell', or 'hold' (same as generate_signal at that index)
+        """
+        # Created lazily: subclasses may define __init__ without super()
+        history = self.__dict__.setdefault('_history', [])
+        history.append(bar)
+        return self.generate_signal(history, len(history) - 1)
+
+    def reset(self) -> None:
+        """Forget live state so the next on_bar starts a new feed"""
+        self._history: List[Bar] = []
+
+
+def _or_zero(value: float) -> float:
+    """Indicator value, or 0.0 where it is undefined (NaN)"""
+    return value if value == value else 0.0
+
+
+class _RunningWindowSum:
+    """
+    Sum of the last `period` values in O(1) per value
+
+    The running total is re-anchored to sum(window) every `period` values,
+    which is exactly how calculate_sma sums a window. In between, the running
+    mean is within `touched * scale` of the exact window mean.
+    """
+
+    __slots__ = ('period', 'window', 'total', 'touched', 'steps', 'scale')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window: deque = deque(maxlen=period)
+        self.total = 0.0
+        self.touched = 0.0  # sum of |value| of every term folded into `total`
+        self.steps = 0      # values pushed since the last anchor
+        # Both sums are within (period + 2 * steps) roundings of the true
+        # sum; 4x slack also covers rounding of the division and comparison
+        self.scale = (4 * period + 4) * 2.0 ** -52 / period
+
+    def push(self, value: float) -> float:
+        """Add the newest value; returns the running SMA (0.0 until the window fills)"""
+        window = self.window
+        if len(window) < self.period:
+            # Still filling: same left-to-right additions as sum(window)
+            window.append(value)
+            self.total += value
+            self.touched += abs(value)
+            return self.total / self.period if len(window) == self.period else 0.0
+
+        oldest = window[0]
+        window.append(value)
+        self.steps += 1
+        if self.steps == self.period:
+            self.total = sum(window)
+            self.touched = sum(map(abs, window))
+            self.steps = 0
+        else:
+            self.total += value - oldest
+            self.touched += abs(value) + abs(oldest)
+        return self.total / self.period
+
+    def exact_mean(self) -> float:
+        """SMA exactly as calculate_sma computes it"""
+        window = self.window
+        return sum(window) / self.period if len(window) == self.period else 0.0
+
 
 class SMAStrategy(Strategy):
     """Simple Moving Average Crossover Strategy"""
 
-    def __init__(self, fast_period: int = 10, slow_period: int = 30):
+    def __init__(
+        self,
+        fast_period: int = 10,
+        slow_period: int = 30,
+        cache: Optional[indicators.IndicatorCache] = None
+    ):
         self.fast_period = fast_period
         self.slow_period = slow_period
+        self.cache = cache
+
+        # SMA series for the bars list currently being run
+        self._bars = None
+        self._bars_len = 0
+        self._fast_sma: indicators.Values = array('d')
+        self._slow_sma: indicators.Values = array('d')
+
+        super().__init__()
+
+    def reset(self) -> None:
+        """Forget live state so the next on_bar starts a new feed"""
+        super().reset()
+        # Running window sums per SMA plus how the previous bar's SMAs compared
+        self._fast_sum = _RunningWindowSum(self.fast_period)
+        self._slow_sum = _RunningWindowSum(self.slow_period)
+        self._prev_cmp = 0
+        self._index = -1
+
+    def prepare(self, bars: List[Bar]) -> None:
+        """Drop the SMA series of the previous pass"""
+        self._bars = None
+        self._bars_len = 0
+        self._fast_sma = self._slow_sma = array('d')
 
     def calculate_sma(self, bars: List[Bar], period: int, end_index: int) -> float:
         """Calculate SMA for given period ending at end_index"""
@@ -54,18 +198,49 @@ class SMAStrategy(Strategy):
         prices = [bar.close for bar in bars[end_index - period + 1:end_index + 1]]
         return sum(prices) / len(prices)
 
+    def _sma_series(self, bars: List[Bar], current_index: int) -> bool:
+        """
+        Fetch both SMA series from the shared indicator cache once per run
+
+        Returns False when the windowed calculate_sma should be used instead:
+        for the newest bar of a history that grows between calls (live feeds),
+        where building and fingerprinting the full series on every call would
+        be O(n) and flush the shared cache, and when a subclass overrides
+        calculate_sma.
+        """
+        # Same list within one pass; prepare() clears this between passes
+        if bars is self._bars and len(bars) == self._bars_len:
+            return True
+        if current_index >= len(bars) - 1 or type(self).calculate_sma is not SMAStrategy.calculate_sma:
+            return False
+
+        series = indicators.PriceSeries.from_bars(bars, columns=('close',))
+        self._fast_sma = indicators.sma(series, self.fast_period, self.cache)
+        self._slow_sma = indicators.sma(series, self.slow_period, self.cache)
+        self._bars = bars
+        self._bars_len = len(bars)
+        return True
+
     def generate_signal(self, bars: List[Bar], current_index: int) -> str:
         """Generate SMA crossover signals"""
         if current_index < self.slow_period:
             return 'hold'
 
-        # Current SMAs
-        fast_sma = self.calculate_sma(bars, self.fast_period, current_index)
-        slow_sma = self.calculate_sma(bars, self.slow_period, current_index)
+        if self._sma_series(bars, current_index):
+            fast, slow = self._fast_sma, self._slow_sma
 
-        # Previous SMAs
-        prev_fast_sma = self.calculate_sma(bars, self.fast_period, current_index - 1)
-        prev_slow_sma = self.calculate_sma(bars, self.slow_period, current_index - 1)
+            # Current SMAs (NaN before the window fills; 0.0 as in calculate_sma)
+            fast_sma = _or_zero(fast[current_index])
+            slow_sma = _or_zero(slow[current_index])
+
+            # Previous SMAs
+            prev_fast_sma = _or_zero(fast[current_index - 1])
+            prev_slow_sma = _or_zero(slow[current_index - 1])
+        else:
+            fast_sma = self.calculate_sma(bars, self.fast_period, current_index)
+            slow_sma = self.calculate_sma(bars, self.slow_period, current_index)
+            prev_fast_sma = self.calculate_sma(bars, self.fast_period, current_index - 1)
+            prev_slow_sma = self.calculate_sma(bars, self.slow_period, current_index - 1)
 
         # Crossover detection
         if prev_fast_sma <= prev_slow_sma and fast_sma > slow_sma:
@@ -75,6 +250,31 @@ class SMAStrategy(Strategy):
 
         return 'hold'
 
+    def on_bar(self, bar: Bar) -> str:
+        """Incremental SMA crossover: O(1) per bar, no history re-scan"""
+        fast, slow = self._fast_sum, self._slow_sum
+        fast_sma = fast.push(bar.close)
+        slow_sma = slow.push(bar.close)
+        self._index += 1
+
+        # Only the comparison of the two SMAs matters. Running sums decide it
+        # unless they are within rounding of each other; then the exact
+        # window sums do, so signals match generate_signal exactly
+        if abs(fast_sma - slow_sma) <= fast.touched * fast.scale + slow.touched * slow.scale:
+            fast_sma, slow_sma = fast.exact_mean(), slow.exact_mean()
+        cmp = (fast_sma > slow_sma) - (fast_sma < slow_sma)
+        prev_cmp, self._prev_cmp = self._prev_cmp, cmp
+
+        if self._index < self.slow_period:
+            return 'hold'
+
+        if prev_cmp <= 0 and cmp > 0:
+            return 'buy'
+        elif prev_cmp >= 0 and cmp < 0:
+            return 'sell'
+
+        return 'hold'
+
 
 class BacktestEngine:
     """
@@ -92,7 +292,9 @@ class BacktestEngine:
         self,
         strategy: Strategy,
         initial_capital: float = 10000.0,
-        risk_params: Dict[str, Any] = None
+        risk_params: Dict[str, Any] = None,
+        use_kernel: Optional[bool] = None,
+        verbose: bool = True
     ):
         """
         Initialize backtest engine
@@ -101,10 +303,15 @@ class BacktestEngine:
             strategy: Trading strategy instance
             initial_capital: Starting capital
             risk_params: Risk management parameters
+            use_kernel: Use the array kernel (engine_kernel.py) for SMAStrategy.
+                None selects it automatically when Numba is installed
+            verbose: Print progress and trade log to stdout
         """
         self.strategy = strategy
         self.initial_capital = initial_capital
-        self.capital = initial_capital
+        self.capital = float(initial_capital)
+        self.use_kernel = use_kernel
+        self.verbose = verbose
 
         # Initialize risk manager
         risk_params = risk_params or {}
@@ -119,8 +326,11 @@ class BacktestEngine:
 
         # Position tracking
         self.open_positions: List[Position] = []
+        self.exit_book = ExitBook()
         self.closed_trades: List[Position] = []
         self.equity_curve: List[Dict] = []
+        self._peak_equity: Optional[float] = None
+        self._last_bar: Optional[Bar] = None
 
     def run(self, historical_data: List[Bar]) -> Dict[str, Any]:
         """
@@ -132,55 +342,198 @@ class BacktestEngine:
         Returns:
             Complete backtest results
         """
-        print(f"Running backtest on {len(historical_data)} bars...")
-        print(f"Initial Capital: ${self.initial_capital:,.2f}")
-        print(f"Risk Management: Commission=${self.risk_manager.commission}, "
-              f"Slippage={self.risk_manager.slippage}%, "
-              f"SL={self.risk_manager.stop_loss_pct}%, "
-              f"TP={self.risk_manager.take_profit_pct}%")
-        print("-" * 80)
+        self._log_header(len(historical_data))
+
+        kernel_mode = self._kernel_mode(len(historical_data))
+        if kernel_mode is not None:
+            try:
+                self._run_kernel(historical_data, compiled=kernel_mode)
+            except engine_kernel.SharesOverflowError:
+                # Engine state is untouched until the kernel succeeds
+                kernel_mode = None
+        if kernel_mode is None:
+            self.strategy.prepare(historical_data)
+            generate_signal = self.strategy.generate_signal
+            for i, bar in enumerate(historical_data):
+                self._process_bar(bar, generate_signal(historical_data, i))
+
+        return self.finish()
+
+    def run_signals(self, historical_data: List[Bar], signals: List[str]) -> Dict[str, Any]:
+        """
+        Run the backtest loop with precomputed strategy signals
 
-        for i, bar in enumerate(historical_data):
-            # 1. Check risk management exits FIRST
-            self._check_exits(bar)
+        Args:
+            historical_data: List of OHLC bars
+            signals: One of 'buy' / 'sell' / 'hold' per bar, e.g. from
+                strategy.signals(historical_data) shared across engines
+
+        Returns:
+            Complete backtest results (same as run)
+        """
+        if len(signals) != len(historical_data):
+            raise ValueError(f"Expected {len(historical_data)} signals, got {len(signals)}")
+
+        self._log_header(len(historical_data))
+        for bar, signal in zip(historical_data, signals):
+            self._process_bar(bar, signal)
+        return self.finish()
+
+    def uses_kernel(self, n_bars: int) -> bool:
+        """Whether run() on n_bars bars would take the engine_kernel path"""
+        return self._kernel_mode(n_bars) is not None
+
+    def on_bar(self, bar: Bar) -> str:
+        """
+        Process one bar of a live / paper-trading feed
+
+        Same exit checks, signal handling and equity bookkeeping as run(),
+        with O(1) work per bar for strategies that implement on_bar
+        incrementally (SMAStrategy does).
 
-            # 2. Generate strategy signal
-            signal = self.strategy.generate_signal(historical_data, i)
+        Args:
+            bar: Newest bar
 
-            # 3. Process signal
-            if signal == 'buy':
-                self._process_buy_signal(bar)
-            elif signal == 'sell':
-                self._process_sell_signal(bar)
+        Returns:
+            The strategy signal for this bar
+        """
+        signal = self.strategy.on_bar(bar)
+        self._process_bar(bar, signal)
+        return signal
 
-            # 4. Update equity curve
-            self._update_equity_curve(bar)
+    def finish(self) -> Dict[str, Any]:
+        """
+        Close remaining positions at the last bar and compute results
 
+        Returns:
+            Complete backtest results (same format as run)
+        """
         # Close any remaining open positions
-        if self.open_positions:
-            last_bar = historical_data[-1]
+        last_bar = self._last_bar
+        if self.open_positions and last_bar is not None:
             for position in self.open_positions[:]:
                 self._close_position(position, last_bar.close, last_bar.date, 'end_of_backtest')
 
         # Calculate performance metrics
         results = self._calculate_performance()
 
-        print("\n" + "=" * 80)
-        print("BACKTEST COMPLETE")
-        print("=" * 80)
-        self._print_summary(results)
+        if self.verbose:
+            print("\n" + "=" * 80)
+            print("BACKTEST COMPLETE")
+            print("=" * 80)
+            self._print_summary(results)
 
         return results
 
+    def _process_bar(self, bar: Bar, signal: str) -> None:
+        """Advance the book by one bar given the strategy's signal"""
+        # 1. Check risk management exits FIRST
+        self._check_exits(bar)
+
+        # 2. Process signal
+        if signal == 'buy':
+            self._process_buy_signal(bar)
+        elif signal == 'sell':
+            self._process_sell_signal(bar)
+
+        # 3. Update equity curve
+        self._update_equity_curve(bar)
+        self._last_bar = bar
+
+    def _log(self, message: str) -> None:
+        """Print a progress/trade message when verbose"""
+        if self.verbose:
+            print(message)
+
+    def _log_header(self, n_bars: int) -> None:
+        self._log(f"Running backtest on {n_bars} bars...")
+        self._log(f"Initial Capital: ${self.initial_capital:,.2f}")
+        self._log(f"Risk Management: Commission=${self.risk_manager.commission}, "
+                  f"Slippage={self.risk_manager.slippage}%, "
+                  f"SL={self.risk_manager.stop_loss_pct}%, "
+                  f"TP={self.risk_manager.take_profit_pct}%")
+        self._log("-" * 80)
+
+    def _kernel_mode(self, n_bars: int) -> Optional[bool]:
+        """
+        Decide whether to run the array kernel
+
+        Args:
+            n_bars: Number of bars about to be processed
+
+        Returns:
+            None for the reference loop, True for the compiled kernel,
+            False for the interpreted kernel (forced without Numba)
+        """
+        if self.use_kernel is False or type(self.strategy) is not SMAStrategy:
+            return None
+        if self.open_positions or self.closed_trades or self.equity_curve:
+            return None  # kernel always starts from a flat book
+        if self.use_kernel:
+            return engine_kernel.HAVE_NUMBA
+        # Auto: don't pay the numba import for series the loop finishes faster
+        if engine_kernel.HAVE_NUMBA and (
+            engine_kernel.is_loaded() or n_bars >= engine_kernel.KERNEL_MIN_BARS
+        ):
+            return True
+        return None
+
+    def _run_kernel(self, historical_data: List[Bar], compiled: bool) -> None:
+        """Run the SMA/RiskManager bar loop through engine_kernel"""
+        state, equity, drawdown, trades = engine_kernel.run_sma_kernel(
+            historical_data,
+            self.strategy.fast_period,
+            self.strategy.slow_period,
+            self.risk_manager,
+            self.capital,
+            compiled=compiled
+        )
+
+        self.capital = state['capital']
+        self.risk_manager.total_commission_paid = state['total_commission_paid']
+        self.risk_manager.total_slippage_cost = state['total_slippage_cost']
+        self.risk_manager.stop_loss_exits += state['stop_loss_exits']
+        self.risk_manager.take_profit_exits += state['take_profit_exits']
+
+        for i, bar in enumerate(historical_data):
+            self.equity_curve.append({
+                'date': bar.date,
+                'equity': equity[i],
+                'drawdown': drawdown[i]
+            })
+        if historical_data:
+            self._last_bar = historical_data[-1]
+
+        for trade in trades:
+            entry_price = trade['entry_price']
+            self.closed_trades.append(Position(
+                entry_price=entry_price,
+                shares=trade['shares'],
+                entry_date=self.equity_curve[trade['entry_index']]['date'],
+                side='long',
+                stop_loss_price=self.risk_manager.calculate_stop_loss_price(entry_price, 'long'),
+                take_profit_price=self.risk_manager.calculate_take_profit_price(entry_price, 'long'),
+                commission_paid=trade['commission_paid'],
+                slippage_cost=trade['slippage_cost'],
+                exit_price=trade['exit_price'],
+                exit_date=self.equity_curve[trade['exit_index']]['date'],
+                exit_reason=trade['exit_reason'],
+                pnl=trade['pnl'],
+                pnl_percent=trade['pnl_percent']
+            ))
+
     def _check_exits(self, bar: Bar) -> None:
-        """Check all open positions for risk management exits"""
-        for position in self.open_positions[:]:
+        """Check open positions whose SL/TP level the bar reaches"""
+        # The exit book only yields positions with a level inside [low, high],
+        # in open order; check_exit still decides priority and exit price
+        for position in self.exit_book.pop_triggered(bar):
             should_exit, exit_price, reason = self.risk_manager.check_exit(position, bar)
 
             if should_exit:
                 self._close_position(position, exit_price, bar.date, reason)
-                print(f"[{bar.date}] {reason.upper()}: Closed at ${exit_price:.2f} "
-                      f"(Entry: ${position.entry_price:.2f})")
+                if self.verbose:
+                    print(f"[{bar.date}] {reason.upper()}: Closed at ${exit_price:.2f} "
+                          f"(Entry: ${position.entry_price:.2f})")
 
     def _process_buy_signal(self, bar: Bar) -> None:
         """Process buy signal - open new position if allowed"""
@@ -198,37 +551,44 @@ class BacktestEngine:
 
         if position:
             self.open_positions.append(position)
+            self.exit_book.add(position)
             self.capital -= position.commission_paid  # Deduct entry commission
 
-            print(f"[{bar.date}] BUY: {position.shares} shares @ ${position.entry_price:.2f} "
-                  f"(SL: ${position.stop_loss_price:.2f if position.stop_loss_price else 'N/A'}, "
-                  f"TP: ${position.take_profit_price:.2f if position.take_profit_price else 'N/A'})")
+            # Only format the trade log when it is printed (on_bar hot path)
+            if self.verbose:
+                stop_loss = f"${position.stop_loss_price:.2f}" if position.stop_loss_price else 'N/A'
+                take_profit = f"${position.take_profit_price:.2f}" if position.take_profit_price else 'N/A'
+                print(f"[{bar.date}] BUY: {position.shares} shares @ ${position.entry_price:.2f} "
+                      f"(SL: {stop_loss}, TP: {take_profit})")
 
     def _process_sell_signal(self, bar: Bar) -> None:
         """Process sell signal - close all open positions"""
         for position in self.open_positions[:]:
             self._close_position(position, bar.close, bar.date, 'strategy')
-            print(f"[{bar.date}] SELL: Closed at ${bar.close:.2f} "
-                  f"(Entry: ${position.entry_price:.2f})")
+            if self.verbose:
+                print(f"[{bar.date}] SELL: Closed at ${bar.close:.2f} "
+                      f"(Entry: ${position.entry_price:.2f})")
 
     def _close_position(self, position: Position, price: float, date: str, reason: str) -> None:
         """Close a position and update capital"""
         closed = self.risk_manager.close_position(position, price, date, reason)
         self.closed_trades.append(closed)
-        self.open_positions.remove(position)
+        self.exit_book.discard(position)
+        # Remove by identity: Position compares by value, which is O(fields)
+        for index, open_position in enumerate(self.open_positions):
+            if open_position is position:
+                del self.open_positions[index]
+                break
 
         # Update capital with P&L
         self.capital += closed.pnl + (closed.entry_price * closed.shares)
 
     def _update_equity_curve(self, bar: Bar) -> None:
         """Update equity curve with current market values"""
-        # Calculate unrealized P&L from open positions
-        unrealized_pnl = sum(
-            pos.unrealized_pnl(bar.close) for pos in self.open_positions
-        )
-
-        # Calculate total equity
-        total_equity = self.capital + unrealized_pnl
+        # Calculate total equity (capital plus unrealized P&L of open positions)
+        total_equity = self.capital
+        if self.open_positions:
+            total_equity += sum(pos.unrealized_pnl(bar.close) for pos in self.open_positions)
 
         self.equity_curve.append({
             'date': bar.date,
@@ -236,13 +596,14 @@ class BacktestEngine:
             'drawdown': self._calculate_drawdown(total_equity)
         })
 
-    def _calculate_drawdown(self, current_equity: float) -> float:
-        """Calculate current drawdown percentage"""
-        if not self.equity_curve:
-            return 0.0
+        if self._peak_equity is None or total_equity > self._peak_equity:
+            self._peak_equity = total_equity
 
-        peak = max(point['equity'] for point in self.equity_curve)
-        if peak == 0:
+    def _calculate_drawdown(self, current_equity: float) -> float:
+        """Calculate current drawdown percentage against the prior peak"""
+        # Running peak instead of re-scanning the curve: O(1) per bar
+        peak = self._peak_equity
+        if peak is None or peak == 0:
             return 0.0
 
         drawdown = (current_equity - peak) / peak
@@ -300,7 +661,7 @@ class BacktestEngine:
 
         return {
             'backtest': {
-                'id': f'bt_{int(datetime.now().timestamp())}',
+                'id': new_backtest_id(),
                 'performance': {
                     'totalReturn': round(total_return, 4),
                     'cagr': round(cagr, 4),
@@ -330,7 +691,7 @@ class BacktestEngine:
         """Return empty results structure"""
         return {
             'backtest': {
-                'id': f'bt_{int(datetime.now().timestamp())}',
+                'id': new_backtest_id(),
                 'performance': {},
                 'trades': [],
                 'equityCurve': self.equity_curve,
@@ -369,19 +730,25 @@ class BacktestEngine:
         print(f"  Total Risk Cost: ${total_cost:.2f} ({cost_pct:.2f}% of initial capital)")
 
 
-def generate_sample_data(days: int = 252) -> List[Bar]:
-    """Generate sample OHLC data for testing"""
+def generate_sample_data(days: int = 252, seed: Optional[int] = None) -> List[Bar]:
+    """
+    Generate sample OHLC data for testing
+
+    Pass a seed for reproducible data; without one the global `random`
+    state is used. For large or non-random-walk series see market_data.py.
+    """
+    rng = random.Random(seed) if seed is not None else random
     bars = []
     base_price = 150.0
     date = datetime(2023, 1, 1)
 
     for _ in range(days):
         # Random walk
-        change = random.uniform(-2, 2)
+        change = rng.uniform(-2, 2)
         open_price = base_price
         close_price = base_price + change
-        high_price = max(open_price, close_price) + random.uniform(0, 1)
-        low_price = min(open_price, close_price) - random.uniform(0, 1)
+        high_price = max(open_price, close_price) + rng.uniform(0, 1)
+        low_price = min(open_price, close_price) - rng.uniform(0, 1)
 
         bar = Bar(
             date=date.strftime('%Y-%m-%d'),
@@ -389,7 +756,7 @@ def generate_sample_data(days: int = 252) -> List[Bar]:
             high=round(high_price, 2),
             low=round(low_price, 2),
             close=round(close_price, 2),
-            volume=random.randint(1000000, 5000000)
+            volume=rng.randint(1000000, 5000000)
         )
         bars.append(bar)
 
@@ -0,0 +1,292 @@
+"""
+Batch Backtest Runner for Backtester Pro
+========================================
+
+Runs N /api/backtest payloads as one batch and shares the work they have in
+common:
+- Specs are grouped by dataset (symbol, timeframe, startDate, endDate) and
+  each dataset is loaded once
+- Specs with the same strategy and parameters on the same dataset share one
+  signal series (Strategy.signals); each spec only runs its own risk loop
+  (BacktestEngine.run_signals)
+- Specs that take the compiled kernel share one set of float64 columns
+- Dataset loads and kernel runs go to a thread pool (loads wait on I/O and
+  the Numba kernel releases the GIL). Pure-Python signal passes and risk
+  loops run in the calling thread, since threads cannot overlap them; the
+  gain there comes from the shared loads and signal passes only
+
+Results come back in spec order. A spec that fails (bad parameters, loader
+error) gets {'error': message} in its slot instead of failing the batch.
+
+Usage:
+    from batch import run_batch
+
+    def load_bars(symbol, timeframe, start_date, end_date):
+        return market_data_api.fetch(symbol, timeframe, start_date, end_date)
+
+    results = run_batch(payloads, load_bars, max_workers=4)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import time
+
+from backtest_engine_example import Strategy
+from engine_factory import EngineFactory
+from risk_management import Bar
+
+
+# Payload fields that identify the bar series a spec runs on
+DATASET_FIELDS = ('symbol', 'timeframe', 'startDate', 'endDate')
+
+# loader(symbol, timeframe, start_date, end_date) -> bars
+Loader = Callable[[Optional[str], Optional[str], Optional[str], Optional[str]], Sequence[Bar]]
+
+
+def dataset_key(spec: Dict[str, Any]) -> Tuple:
+    """Key of the dataset a spec runs on"""
+    return tuple(spec.get(field) for field in DATASET_FIELDS)
+
+
+def strategy_key(strategy: Strategy) -> Tuple:
+    """
+    Key of the signal series a built strategy produces
+
+    Uses the strategy class and its resolved public attributes rather than
+    the raw payload, so {'fastPeriod': 10} and {'fastPeriod': '10',
+    'slowPeriod': 30} share a signal pass once defaults and types are applied.
+    """
+    parameters = tuple(sorted(
+        (name, value) for name, value in vars(strategy).items() if not name.startswith('_')
+    ))
+    try:
+        hash(parameters)
+    except TypeError:
+        parameters = repr(parameters)
+    return type(strategy), parameters
+
+
+class ColumnBars(list):
+    """
+    List of Bar objects that also carries float64 high/low/close arrays
+
+    engine_kernel reads the columns zero-copy instead of rebuilding them
+    from the bars for every spec; everything else sees a plain list.
+    """
+
+    def __init__(self, bars: Sequence[Bar]):
+        import numpy as np  # only needed once a kernel run is planned
+
+        super().__init__(bars)
+        self.high = np.array([bar.high for bar in self], dtype=np.float64)
+        self.low = np.array([bar.low for bar in self], dtype=np.float64)
+        self.close = np.array([bar.close for bar in self], dtype=np.float64)
+
+
+class BatchRunner:
+    """Runs batches of backtest specs with shared data and signal work"""
+
+    def __init__(self, loader: Loader, max_workers: Optional[int] = None, use_kernel: Optional[bool] = None):
+        """
+        Initialize batch runner
+
+        Args:
+            loader: Called as loader(symbol, timeframe, startDate, endDate)
+                once per distinct dataset in a batch
+            max_workers: Thread pool size for dataset loads and kernel runs
+                (None = ThreadPoolExecutor default)
+            use_kernel: Passed to every BacktestEngine (None = automatic)
+        """
+        self.loader = loader
+        self.max_workers = max_workers
+        self.use_kernel = use_kernel
+
+        self.batches = 0
+        self.specs = 0
+        self.dataset_loads = 0
+        self.signal_passes = 0
+        self.shared_signal_runs = 0
+        self.kernel_runs = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def run(self, specs: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run a batch of /api/backtest payloads
+
+        Args:
+            specs: Request payloads (strategy, symbol, dates, parameters,
+                riskManagement, initialCapital)
+
+        Returns:
+            One result per spec, in order: BacktestEngine results or
+            {'error': message}
+        """
+        start = time.perf_counter()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(specs)
+
+        # Validate every spec up front; invalid ones never touch the loader
+        factories: Dict[int, EngineFactory] = {}
+        for i, spec in enumerate(specs):
+            try:
+                factories[i] = EngineFactory.from_request(spec, use_kernel=self.use_kernel)
+            except (ValueError, TypeError) as exc:
+                results[i] = {'error': str(exc)}
+
+        groups: Dict[Tuple, List[int]] = {}
+        for i in factories:
+            groups.setdefault(dataset_key(specs[i]), []).append(i)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # 1. Load each dataset once
+            loads = {key: pool.submit(self.loader, *key) for key in groups}
+            datasets = {}
+            for key, future in loads.items():
+                try:
+                    bars = future.result()
+                    if bars is None:
+                        raise ValueError("loader returned None")
+                    datasets[key] = bars
+                    self.dataset_loads += 1
+                except Exception as exc:
+                    for i in groups[key]:
+                        results[i] = {'error': f"Failed to load {key}: {exc}"}
+
+            # 2. Plan engines; one signal pass per (dataset, strategy, parameters)
+            engines = {}
+            signal_jobs: Dict[Tuple, Strategy] = {}
+            kernel_bars = {}
+            for key, bars in datasets.items():
+                for i in groups[key]:
+                    try:
+                        engine = factories[i].create()
+                        if engine.uses_kernel(len(bars)):
+                            if key not in kernel_bars:
+                                # BarSeriesView / MarketData already expose columns
+                                kernel_bars[key] = bars if hasattr(bars, 'close') else ColumnBars(bars)
+                            engines[i] = engine
+                            continue
+                        job = (key, strategy_key(engine.strategy))
+                        if job not in signal_jobs:
+                            signal_jobs[job] = engine.strategy
+                        else:
+                            self.shared_signal_runs += 1
+                        engines[i] = engine
+                    except Exception as exc:
+                        results[i] = {'error': str(exc)}
+            self.signal_passes += len(signal_jobs)
+
+            # 3. Start kernel runs on the pool, then run the pure-Python
+            # specs here while they execute
+            runs = {}
+            for i, engine in engines.items():
+                key = dataset_key(specs[i])
+                if key in kernel_bars:
+                    runs[i] = pool.submit(engine.run, kernel_bars[key])
+                    self.kernel_runs += 1
+
+            signals: Dict[Tuple, Any] = {}
+            for i, engine in engines.items():
+                key = dataset_key(specs[i])
+                if key in kernel_bars:
+                    continue
+                job = (key, strategy_key(engine.strategy))
+                if job not in signals:
+                    try:
+                        signals[job] = signal_jobs[job].signals(datasets[key])
+                    except Exception as exc:
+                        # A failed signal pass fails every spec that shares it
+                        signals[job] = exc
+                if isinstance(signals[job], Exception):
+                    results[i] = {'error': str(signals[job])}
+                    continue
+                try:
+                    results[i] = engine.run_signals(datasets[key], signals[job])
+                except Exception as exc:
+                    results[i] = {'error': str(exc)}
+            for i, future in runs.items():
+                try:
+                    results[i] = future.result()
+                except Exception as exc:
+                    results[i] = {'error': str(exc)}
+
+        self.batches += 1
+        self.specs += len(specs)
+        self.errors += sum(1 for result in results if 'error' in result)
+        self.elapsed += time.perf_counter() - start
+        return results
+
+    def get_statistics(self) -> dict:
+        """Get work-sharing statistics across all batches run"""
+        return {
+            'batches': self.batches,
+            'specs': self.specs,
+            'datasetLoads': self.dataset_loads,
+            'signalPasses': self.signal_passes,
+            'sharedSignalRuns': self.shared_signal_runs,
+            'kernelRuns': self.kernel_runs,
+            'errors': self.errors,
+            'elapsedMs': round(self.elapsed * 1000, 1),
+        }
+
+
+def run_batch(
+    specs: Sequence[Dict[str, Any]],
+    loader: Loader,
+    max_workers: Optional[int] = None,
+    use_kernel: Optional[bool] = None
+) -> List[Dict[str, Any]]:
+    """Run a batch of /api/backtest payloads (see BatchRunner.run)"""
+    return BatchRunner(loader, max_workers=max_workers, use_kernel=use_kernel).run(specs)
+
+
+# Example usage
+if __name__ == "__main__":
+    import zlib
+    from backtest_engine_example import generate_sample_data
+
+    def load_bars(symbol, timeframe, start_date, end_date):
+        time.sleep(0.05)  # stands in for the market data API / database
+        return generate_sample_data(days=1000, seed=zlib.crc32(symbol.encode()))
+
+    specs = []
+    for symbol in ('AAPL', 'AAPL', 'MSFT'):
+        for fast, slow in ((5, 20), (10, 30), (20, 50)):
+            for stop_loss, take_profit in ((None, None), (1.0, 2.0), (2.0, 5.0), (3.0, 10.0)):
+                specs.append({
+                    'strategy': 'smaCrossover', 'symbol': symbol, 'timeframe': 'day',
+                    'startDate': '2021-01-01', 'endDate': '2024-12-31', 'initialCapital': 10000,
+                    'parameters': {'fastPeriod': fast, 'slowPeriod': slow},
+                    'riskManagement': {'commission': 0.5, 'slippage': 0.05,
+                                       'stopLoss': stop_loss, 'takeProfit': take_profit},
+                })
+    specs.append({'strategy': 'rsiReversal', 'symbol': 'AAPL'})
+
+    # One request at a time: load, build, run
+    start = time.perf_counter()
+    expected = []
+    for spec in specs:
+        try:
+            factory = EngineFactory.from_request(spec)
+        except ValueError as exc:
+            expected.append({'error': str(exc)})
+            continue
+        expected.append(factory.create().run(load_bars(*dataset_key(spec))))
+    sequential = time.perf_counter() - start
+
+    runner = BatchRunner(load_bars, max_workers=4)
+    start = time.perf_counter()
+    results = runner.run(specs)
+    batched = time.perf_counter() - start
+
+    def comparable(result):
+        if 'error' in result:
+            return result
+        return {key: result['backtest'][key] for key in ('performance', 'trades', 'equityCurve')}
+
+    print(f"{len(specs)} specs:")
+    print(f"  One at a time: {sequential * 1000:.0f} ms")
+    print(f"  Batch:         {batched * 1000:.0f} ms")
+    print(f"  Same results, same order: {[comparable(r) for r in results] == [comparable(r) for r in expected]}")
+    print(f"  Statistics: {runner.get_statistics()}")
+    print(f"  Last spec: {results[-1]}")
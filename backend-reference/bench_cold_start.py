@@ -0,0 +1,90 @@
+"""
+Cold-Start Benchmark for the Backtest Worker
+============================================
+
+Measures time from process start to the first BacktestEngine.run result for
+a small daily backtest (252 bars), the critical path of a per-request worker.
+
+Each sample is a fresh interpreter. Reported times:
+- total: wall time of the whole process (interpreter + imports + backtest)
+- interpreter: wall time of `python -c pass` (the floor we can't change)
+- ours: total - interpreter, compared against the target
+
+Usage:
+    python bench_cold_start.py [--runs 20] [--target-ms 100]
+"""
+
+from typing import List, Tuple
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+WORKER = """
+import time
+start = time.perf_counter()
+from engine_factory import EngineFactory
+from backtest_engine_example import generate_sample_data
+imported = time.perf_counter()
+factory = EngineFactory(risk_params={'commission': 0.5, 'slippage': 0.05, 'stopLoss': 2.0, 'takeProfit': 5.0})
+results = factory.create().run(generate_sample_data(days=252, seed=1))
+done = time.perf_counter()
+assert results['backtest']['equityCurve']
+print(f"{(imported - start) * 1000:.3f} {(done - imported) * 1000:.3f}")
+"""
+
+
+def time_process(code: str) -> Tuple[float, str]:
+    """Run `python -c code` in this directory; return (wall ms, stdout)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=here, check=True, capture_output=True, text=True
+    )
+    return (time.perf_counter() - start) * 1000, out.stdout.strip()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--target-ms', type=float, default=100.0)
+    args = parser.parse_args()
+
+    # First run populates __pycache__; it's not what a deployed worker sees
+    time_process(WORKER)
+
+    baseline, totals, imports, runs = [], [], [], []
+    for _ in range(args.runs):
+        baseline.append(time_process('pass')[0])
+        total, out = time_process(WORKER)
+        import_ms, run_ms = (float(x) for x in out.split())
+        totals.append(total)
+        imports.append(import_ms)
+        runs.append(run_ms)
+
+    interpreter = statistics.median(baseline)
+    ours = [t - interpreter for t in totals]
+
+    print(f"Cold start over {args.runs} processes (median / p95):")
+    print(f"  Interpreter:        {interpreter:7.1f} ms")
+    print(f"  Total:              {statistics.median(totals):7.1f} / {percentile(totals, 95):7.1f} ms")
+    print(f"  Imports:            {statistics.median(imports):7.1f} / {percentile(imports, 95):7.1f} ms")
+    print(f"  Engine + run:       {statistics.median(runs):7.1f} / {percentile(runs, 95):7.1f} ms")
+    print(f"  Ours (total - interpreter): {statistics.median(ours):.1f} / {percentile(ours, 95):.1f} ms")
+
+    verdict = 'PASS' if statistics.median(ours) < args.target_ms else 'FAIL'
+    print(f"  Target {args.target_ms:.0f} ms: {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Live-Mode Latency Benchmark for BacktestEngine.on_bar
+=====================================================
+
+Replays bars from a separate process over a multiprocessing Pipe (standing in
+for a live feed) and times BacktestEngine.on_bar for each one, the per-bar
+critical path of paper/live trading with SMAStrategy + RiskManager.
+
+It also checks that feeding the same bars through on_bar + finish gives the
+same trades and equity curve as BacktestEngine.run.
+
+Reported times:
+- on_bar: strategy signal + exit checks + order handling + equity update,
+  over all bars and split into quiet bars and bars that open or close a
+  position (Position objects and RiskManager accounting, ~3x a quiet bar)
+- feed: Pipe receive + Bar construction (transport, not engine work)
+
+The target is a p99 of a few microseconds (--target-us, default 5), checked
+separately for quiet bars and for all bars. The overall target is NOT met by
+the pure-Python engine: bars with orders (roughly 4% of bars with SL/TP)
+are 3-5x slower than quiet bars, so they set the overall p99. Quiet bars do
+not meet it either: their tail is mostly cyclic-GC pauses and scheduler
+contention with the feed process. Measured on one shared core: quiet bars
+about 2-3 us p50 and 9-13 us p99, bars with orders about 8-12 us p50, and an
+overall p99 of 11-19 us.
+
+Usage:
+    python bench_live_latency.py [--bars 20000] [--target-us 5]
+"""
+
+from typing import Any, Dict, List
+import argparse
+import multiprocessing
+import time
+
+from backtest_engine_example import BacktestEngine, SMAStrategy
+from market_data import TRADING_DAYS, generate_market_data
+from risk_management import Bar
+
+
+RISK_PARAMS = {
+    'commission': 0.50,
+    'slippage': 0.05,
+    'stopLoss': 2.0,
+    'takeProfit': 5.0,
+    'positionSize': 100,
+    'maxPositions': 1
+}
+
+
+def sample_bars(n_bars: int, seed: int) -> List[Bar]:
+    """Minute-scale GBM bars (stays positive over long replays)"""
+    return generate_market_data('gbm', n_bars, seed=seed, dt=1 / (TRADING_DAYS * 390)).to_bars()
+
+
+def replay(conn, n_bars: int, seed: int) -> None:
+    """Feed process: send bars one at a time, then None"""
+    for bar in sample_bars(n_bars, seed):
+        conn.send((bar.date, bar.open, bar.high, bar.low, bar.close, bar.volume))
+    conn.send(None)
+    conn.close()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def comparable(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Results without the per-run id and timestamp"""
+    backtest = results['backtest']
+    return {key: backtest[key] for key in ('performance', 'trades', 'equityCurve')}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--bars', type=int, default=20_000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--target-us', type=float, default=5.0)
+    args = parser.parse_args()
+
+    engine = BacktestEngine(SMAStrategy(10, 30), risk_params=RISK_PARAMS, use_kernel=False, verbose=False)
+
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    feed = multiprocessing.Process(target=replay, args=(sender, args.bars, args.seed), daemon=True)
+    feed.start()
+    sender.close()
+
+    clock = time.perf_counter_ns
+    on_bar = engine.on_bar
+    open_positions, closed_trades = engine.open_positions, engine.closed_trades
+    bar_ns, feed_ns, order_bars = [], [], []
+    while True:
+        start = clock()
+        message = receiver.recv()
+        if message is None:
+            break
+        bar = Bar(*message)
+        book = (len(open_positions), len(closed_trades))
+        received = clock()
+        on_bar(bar)
+        done = clock()
+        feed_ns.append(received - start)
+        bar_ns.append(done - received)
+        order_bars.append(book != (len(open_positions), len(closed_trades)))
+    feed.join()
+
+    live = engine.finish()
+    batch = BacktestEngine(SMAStrategy(10, 30), risk_params=RISK_PARAMS, use_kernel=False, verbose=False)
+    expected = batch.run(sample_bars(args.bars, args.seed))
+
+    bar_us = [ns / 1000 for ns in bar_ns]
+    feed_us = [ns / 1000 for ns in feed_ns]
+    quiet_us = [us for us, order in zip(bar_us, order_bars) if not order]
+    order_us = [us for us, order in zip(bar_us, order_bars) if order]
+    print(f"{len(bar_us)} bars replayed over a Pipe, {len(live['backtest']['trades'])} trades:")
+    for name, values in (('on_bar', bar_us), ('  quiet', quiet_us), ('  orders', order_us), ('feed', feed_us)):
+        if values:
+            print(f"  {name:8s} p50 {percentile(values, 50):6.2f} us   p99 {percentile(values, 99):6.2f} us   "
+                  f"max {max(values):8.1f} us   ({len(values)} bars)")
+    print(f"  Same results as run(): {comparable(live) == comparable(expected)}")
+
+    for name, values in (('quiet bars', quiet_us), ('all bars', bar_us)):
+        verdict = 'PASS' if values and percentile(values, 99) < args.target_us else 'FAIL'
+        print(f"  Target p99 < {args.target_us:.1f} us, {name}: {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,587 @@
+"""
+Shared-Memory Dataset Server for Backtester Pro
+===============================================
+
+Every API worker that runs a BacktestEngine used to load its own copy of the
+same popular symbols. This module loads each bar series ONCE into a
+`multiprocessing.shared_memory` segment and hands out read-only, zero-copy
+views to any worker process on the host.
+
+It handles:
+- Loading bar series into shared memory segments (one per symbol)
+- Read-only zero-copy views by symbol and date range
+- Reference counting of segments in use by workers
+- LRU eviction of cold symbols under a memory budget
+
+Segment layout (n bars, all columns contiguous):
+    open[n] f8 | high[n] f8 | low[n] f8 | close[n] f8 | volume[n] i8 | date[n] ASCII
+
+Usage:
+    # Host process (e.g. API master, before forking workers)
+    from dataset_server import DatasetServer
+
+    server = DatasetServer(
+        loader=load_bars_from_db,           # callable: symbol -> List[Bar]
+        memory_budget=512 * 1024 * 1024,    # 512 MB
+        address=('127.0.0.1', 50555),
+        authkey=b'omega'
+    )
+    server.start()
+
+    # Any worker process
+    from dataset_server import DatasetClient
+
+    client = DatasetClient(address=('127.0.0.1', 50555), authkey=b'omega')
+    with client.open('AAPL', start='2023-01-01', end='2024-01-01') as bars:
+        results = engine.run(bars)  # BarSeriesView behaves like List[Bar]
+"""
+
+from dataclasses import dataclass
+from collections import OrderedDict
+from multiprocessing import shared_memory, resource_tracker
+from multiprocessing.managers import BaseManager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import atexit
+import struct
+import sys
+import threading
+import weakref
+
+from risk_management import Bar
+
+
+FLOAT_COLUMNS = ('open', 'high', 'low', 'close')
+COLUMN_ITEMSIZE = 8
+
+
+@dataclass
+class SegmentInfo:
+    """Location of a symbol's bar series in shared memory"""
+    name: str
+    length: int
+    date_width: int
+
+    @property
+    def nbytes(self) -> int:
+        return segment_size(self.length, self.date_width)
+
+
+def segment_size(length: int, date_width: int) -> int:
+    """Size in bytes of a segment holding `length` bars"""
+    return length * (5 * COLUMN_ITEMSIZE + date_width)
+
+
+def write_segment(buf: memoryview, bars: Sequence[Bar], date_width: int) -> None:
+    """Serialize bars into a segment buffer using the column layout above"""
+    n = len(bars)
+    offset = 0
+
+    for column in FLOAT_COLUMNS:
+        struct.pack_into(f'{n}d', buf, offset, *(getattr(bar, column) for bar in bars))
+        offset += n * COLUMN_ITEMSIZE
+
+    struct.pack_into(f'{n}q', buf, offset, *(int(bar.volume) for bar in bars))
+    offset += n * COLUMN_ITEMSIZE
+
+    for i, bar in enumerate(bars):
+        encoded = bar.date.encode('ascii')
+        start = offset + i * date_width
+        buf[start:start + len(encoded)] = encoded
+        # Pad short dates so stale bytes never leak into the next lookup
+        buf[start + len(encoded):start + date_width] = b'\0' * (date_width - len(encoded))
+
+
+TRACK_ARGUMENT = sys.version_info >= (3, 13)
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    try:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+
+
+def create_segment(size: int) -> shared_memory.SharedMemory:
+    """
+    Create a segment whose lifetime is owned by the DatasetManager
+
+    Segments are kept out of the resource tracker: before Python 3.13 every
+    process that attaches registers the segment and unlinks it on exit,
+    which would destroy the data for every other worker.
+    """
+    if TRACK_ARGUMENT:
+        return shared_memory.SharedMemory(create=True, size=size, track=False)
+
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    _untrack(shm)
+    return shm
+
+
+def attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without taking ownership of it"""
+    if TRACK_ARGUMENT:
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    shm = shared_memory.SharedMemory(name=name)
+    _untrack(shm)
+    return shm
+
+
+def unlink_segment(shm: shared_memory.SharedMemory) -> None:
+    """Close and unlink a segment created with create_segment()"""
+    shm.close()
+    if not TRACK_ARGUMENT:
+        # unlink() unregisters unconditionally; keep the tracker balanced
+        resource_tracker.register(shm._name, 'shared_memory')
+    shm.unlink()
+
+
+class BarSeriesView:
+    """
+    Read-only, zero-copy view over a bar series in shared memory
+
+    Behaves like a List[Bar] (len, indexing, slicing, iteration), so it can
+    be passed straight to BacktestEngine.run. Bar objects are materialized
+    on access; the underlying columns are never copied.
+
+    Slices are views too. Each view tracks the slices taken from it, so
+    release() on the root also releases every live slice.
+    """
+
+    def __init__(
+        self,
+        buf: memoryview,
+        length: int,
+        date_width: int,
+        start: int = 0,
+        stop: Optional[int] = None
+    ):
+        self._buf = buf.toreadonly()
+        self._length = length
+        self._date_width = date_width
+        self._start = start
+        self._stop = length if stop is None else stop
+
+        float_bytes = length * COLUMN_ITEMSIZE
+        self.open = self._column(0, 'd')
+        self.high = self._column(1, 'd')
+        self.low = self._column(2, 'd')
+        self.close = self._column(3, 'd')
+        self.volume = self._column(4, 'q')
+        self._date_offset = 5 * float_bytes
+        self._derived: 'weakref.WeakSet[BarSeriesView]' = weakref.WeakSet()
+
+    def _column(self, index: int, fmt: str) -> memoryview:
+        base = index * self._length * COLUMN_ITEMSIZE
+        column = self._buf[base + self._start * COLUMN_ITEMSIZE:base + self._stop * COLUMN_ITEMSIZE]
+        return column.cast(fmt)
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def date(self, index: int) -> str:
+        """Date string of the bar at `index` (relative to this view)"""
+        start = self._date_offset + (self._start + index) * self._date_width
+        raw = self._buf[start:start + self._date_width].tobytes()
+        return raw.rstrip(b'\0').decode('ascii')
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("BarSeriesView only supports contiguous slices")
+            stop = max(start, stop)
+            view = BarSeriesView(
+                self._buf, self._length, self._date_width,
+                self._start + start, self._start + stop
+            )
+            self._derived.add(view)
+            return view
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("bar index out of range")
+
+        return Bar(
+            date=self.date(index),
+            open=self.open[index],
+            high=self.high[index],
+            low=self.low[index],
+            close=self.close[index],
+            volume=self.volume[index]
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def bisect(self, date: str) -> int:
+        """Index of the first bar whose date is >= `date` (dates sorted ascending)"""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.date(mid) < date:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def between(self, start: Optional[str] = None, end: Optional[str] = None) -> 'BarSeriesView':
+        """Sub-view of bars with start <= date <= end (inclusive, ISO strings)"""
+        lo = self.bisect(start) if start else 0
+        hi = self.bisect(end + '\x7f') if end else len(self)
+        return self[lo:hi]
+
+    def release(self) -> None:
+        """Release buffer exports (including slices) so the segment can be closed"""
+        for view in list(self._derived):
+            view.release()
+        for column in (self.open, self.high, self.low, self.close, self.volume):
+            column.release()
+        self._buf.release()
+
+
+class DatasetManager:
+    """
+    Registry of shared-memory bar series with refcounts and an LRU budget
+
+    Lives in the host process. All methods are thread-safe, since the
+    DatasetServer serves each worker connection on its own thread.
+
+    References are recorded per calling thread, which under DatasetServer
+    means per worker connection. The server ends that thread when the
+    connection closes, including when a worker is killed inside
+    `with client.open(...)`, and references of ended threads are reclaimed
+    before evicting, so a dead worker cannot pin a segment.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], List[Bar]],
+        memory_budget: int = 256 * 1024 * 1024
+    ):
+        """
+        Initialize dataset manager
+
+        Args:
+            loader: Callable returning the full bar series for a symbol
+            memory_budget: Soft cap in bytes for segments held in memory;
+                segments with references are never evicted, even over budget
+        """
+        self.loader = loader
+        self.memory_budget = memory_budget
+
+        self._lock = threading.Lock()
+        # symbol -> (shm, info); ordered from least to most recently used
+        self._segments: 'OrderedDict[str, Tuple[shared_memory.SharedMemory, SegmentInfo]]' = OrderedDict()
+        self._refcounts: Dict[str, int] = {}
+        # holder thread -> symbol -> references it took
+        self._holders: Dict[threading.Thread, Dict[str, int]] = {}
+        # symbol -> event set when its in-flight load finishes
+        self._loading: Dict[str, threading.Event] = {}
+        self._total_bytes = 0
+
+        # Statistics tracking
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+        self.reclaimed = 0
+
+        atexit.register(self.shutdown)
+
+    def acquire(self, symbol: str) -> SegmentInfo:
+        """
+        Get (loading if needed) the segment for a symbol and take a reference
+
+        The loader runs outside the manager lock, so a slow load only blocks
+        callers waiting for that same symbol.
+
+        Args:
+            symbol: Ticker symbol
+
+        Returns:
+            SegmentInfo the caller can attach to by name
+        """
+        while True:
+            with self._lock:
+                entry = self._segments.get(symbol)
+                if entry is not None:
+                    self.hits += 1
+                    self._segments.move_to_end(symbol)
+                    self._take_ref(symbol)
+                    return entry[1]
+
+                pending = self._loading.get(symbol)
+                if pending is None:
+                    pending = self._loading[symbol] = threading.Event()
+                    break
+            # Another caller is loading this symbol; use its segment (or
+            # retry the load ourselves if it failed)
+            pending.wait()
+
+        try:
+            shm, info = self._load(symbol)
+        except BaseException:
+            with self._lock:
+                del self._loading[symbol]
+            pending.set()
+            raise
+
+        with self._lock:
+            self._segments[symbol] = (shm, info)
+            self._total_bytes += info.nbytes
+            self.loads += 1
+            # Take the reference before evicting so the new segment is never
+            # a candidate; a held dataset may exceed the (soft) budget
+            self._take_ref(symbol)
+            del self._loading[symbol]
+            self._evict()
+        pending.set()
+        return info
+
+    def release(self, symbol: str) -> None:
+        """Drop a reference taken with acquire(), preferably the caller's own"""
+        with self._lock:
+            if self._refcounts.get(symbol, 0) <= 0:
+                raise ValueError(f"Dataset {symbol!r} is not acquired")
+
+            current = threading.current_thread()
+            if symbol in self._holders.get(current, {}):
+                holder = current
+            else:
+                holder = next(thread for thread, held in self._holders.items() if symbol in held)
+            self._drop_refs(holder, symbol, 1)
+            self._evict()
+
+    def _take_ref(self, symbol: str) -> None:
+        """Record a reference for the calling thread (called with the lock)"""
+        self._refcounts[symbol] = self._refcounts.get(symbol, 0) + 1
+        held = self._holders.setdefault(threading.current_thread(), {})
+        held[symbol] = held.get(symbol, 0) + 1
+
+    def _drop_refs(self, holder: threading.Thread, symbol: str, count: int) -> None:
+        held = self._holders[holder]
+        held[symbol] -= count
+        if not held[symbol]:
+            del held[symbol]
+            if not held:
+                del self._holders[holder]
+        self._refcounts[symbol] -= count
+
+    def _reclaim(self) -> None:
+        """Drop references held by threads that have ended (closed connections)"""
+        for holder in [thread for thread in self._holders if not thread.is_alive()]:
+            for symbol, count in list(self._holders[holder].items()):
+                self._drop_refs(holder, symbol, count)
+                self.reclaimed += count
+
+    def _load(self, symbol: str) -> Tuple[shared_memory.SharedMemory, SegmentInfo]:
+        """Load a symbol's bars into a new segment (called without the lock)"""
+        bars = self.loader(symbol)
+        if not bars:
+            raise KeyError(f"No bars available for {symbol!r}")
+
+        date_width = max(len(bar.date) for bar in bars)
+        size = segment_size(len(bars), date_width)
+
+        shm = create_segment(size)
+        try:
+            write_segment(shm.buf, bars, date_width)
+        except BaseException:
+            unlink_segment(shm)
+            raise
+
+        return shm, SegmentInfo(name=shm.name, length=len(bars), date_width=date_width)
+
+    def _evict(self) -> None:
+        """Unlink least recently used segments nobody holds until under budget"""
+        if self._total_bytes <= self.memory_budget:
+            return
+
+        self._reclaim()
+        for symbol in list(self._segments):
+            if self._total_bytes <= self.memory_budget:
+                break
+            if self._refcounts.get(symbol, 0) > 0:
+                continue
+            self._drop(symbol)
+            self.evictions += 1
+
+    def _drop(self, symbol: str) -> None:
+        shm, info = self._segments.pop(symbol)
+        self._refcounts.pop(symbol, None)
+        self._total_bytes -= info.nbytes
+        unlink_segment(shm)
+
+    def shutdown(self) -> None:
+        """Unlink every segment regardless of refcounts"""
+        with self._lock:
+            for symbol in list(self._segments):
+                self._drop(symbol)
+            self._holders.clear()
+
+    def get_statistics(self) -> dict:
+        """
+        Get dataset cache statistics
+
+        Returns:
+            Dictionary with cache stats
+        """
+        with self._lock:
+            self._reclaim()
+            return {
+                'symbols': list(self._segments),
+                'refcounts': dict(self._refcounts),
+                'residentBytes': self._total_bytes,
+                'memoryBudget': self.memory_budget,
+                'loads': self.loads,
+                'hits': self.hits,
+                'evictions': self.evictions,
+                'reclaimed': self.reclaimed
+            }
+
+
+class _ServerManager(BaseManager):
+    """Host-side transport for DatasetManager calls from worker processes"""
+
+
+class _ClientManager(BaseManager):
+    """Worker-side transport; registered separately so a host process can
+    also act as a client without clobbering the server registration"""
+
+
+_ClientManager.register('datasets')
+
+
+class DatasetServer:
+    """
+    Exposes a DatasetManager to worker processes over a local socket
+
+    The manager stays in the host process; the server runs on a daemon
+    thread so segments outlive individual workers.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], List[Bar]],
+        memory_budget: int = 256 * 1024 * 1024,
+        address: Tuple[str, int] = ('127.0.0.1', 0),
+        authkey: bytes = b'backtester-pro'
+    ):
+        self.datasets = DatasetManager(loader, memory_budget)
+        self.authkey = authkey
+
+        manager_cls = type('_DatasetServerManager', (_ServerManager,), {})
+        manager_cls.register('datasets', callable=lambda: self.datasets)
+        self._manager = manager_cls(address=address, authkey=authkey)
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Bound address (useful when started on port 0)"""
+        return self._server.address
+
+    def start(self) -> None:
+        """Start serving worker connections on a background thread"""
+        self._server = self._manager.get_server()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        """Stop serving and unlink all segments"""
+        if self._server is not None:
+            self._server.stop_event.set()
+        self.datasets.shutdown()
+
+
+class _DatasetHandle:
+    """Context manager returned by DatasetClient.open()"""
+
+    def __init__(self, client: 'DatasetClient', symbol: str, start: Optional[str], end: Optional[str]):
+        self.client = client
+        self.symbol = symbol
+        self.start = start
+        self.end = end
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._full: Optional[BarSeriesView] = None
+        self._view: Optional[BarSeriesView] = None
+
+    def __enter__(self) -> BarSeriesView:
+        info = self.client.registry.acquire(self.symbol)
+        try:
+            self._shm = attach_segment(info.name)
+        except Exception:
+            self.client.registry.release(self.symbol)
+            raise
+
+        self._full = BarSeriesView(self._shm.buf, info.length, info.date_width)
+        self._view = self._full.between(self.start, self.end)
+        return self._view
+
+    def __exit__(self, *exc) -> None:
+        try:
+            # Releases self._view and any slices taken from it
+            self._full.release()
+            self._shm.close()
+        finally:
+            self.client.registry.release(self.symbol)
+
+
+class DatasetClient:
+    """Worker-side access to datasets held by a DatasetServer"""
+
+    def __init__(self, address: Tuple[str, int], authkey: bytes = b'backtester-pro'):
+        self._manager = _ClientManager(address=address, authkey=authkey)
+        self._manager.connect()
+        self.registry = self._manager.datasets()
+
+    def open(self, symbol: str, start: Optional[str] = None, end: Optional[str] = None) -> _DatasetHandle:
+        """
+        Open a read-only view of a symbol's bars
+
+        Args:
+            symbol: Ticker symbol
+            start: First date to include (inclusive), or None
+            end: Last date to include (inclusive), or None
+
+        Returns:
+            Context manager yielding a BarSeriesView; the reference is
+            released on exit, after which the view and any slices of it
+            must not be used. Arrays built on its columns (np.asarray)
+            must not outlive the block either: closing the segment raises
+            BufferError while they exist (the reference is still released)
+        """
+        return _DatasetHandle(self, symbol, start, end)
+
+
+# Example usage
+if __name__ == "__main__":
+    from multiprocessing import Process
+    from backtest_engine_example import generate_sample_data
+
+    def load_bars(symbol: str) -> List[Bar]:
+        return generate_sample_data(days=252)
+
+    def worker(address: Tuple[str, int], worker_id: int) -> None:
+        client = DatasetClient(address=address, authkey=b'demo')
+        with client.open('AAPL', start='2023-03-01', end='2023-03-31') as bars:
+            print(f"  Worker {worker_id}: {len(bars)} bars, "
+                  f"first close ${bars[0].close:.2f} on {bars[0].date}")
+
+    server = DatasetServer(load_bars, memory_budget=1024 * 1024, authkey=b'demo')
+    server.start()
+
+    print("Starting 4 workers against one shared segment...")
+    workers = [Process(target=worker, args=(server.address, i)) for i in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join()
+
+    print("\nDataset Server Statistics:")
+    for key, value in server.datasets.get_statistics().items():
+        print(f"  {key}: {value}")
+
+    server.shutdown()
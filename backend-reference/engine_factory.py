@@ -0,0 +1,140 @@
+"""
+Prewarmed Engine Factory for Backtester Pro
+===========================================
+
+Builds BacktestEngine instances from the frontend /api/backtest payload with
+everything that can be done ahead of time already done:
+- Strategy lookup and parameter validation happen once per factory
+- warm() runs a tiny backtest so modules, bytecode and code paths are hot,
+  and (optionally) compiles the Numba kernel before the first request
+
+Usage:
+    from engine_factory import EngineFactory
+
+    # At worker start
+    factory = EngineFactory.from_request(payload).warm()
+
+    # Per request
+    engine = factory.create()
+    results = engine.run(historical_data)
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+from backtest_engine_example import BacktestEngine, SMAStrategy, Strategy
+from risk_management import Bar
+import engine_kernel
+
+
+# Frontend strategy name -> builder taking the `parameters` object
+STRATEGIES: Dict[str, Callable[[Dict[str, Any]], Strategy]] = {
+    'smaCrossover': lambda params: SMAStrategy(
+        fast_period=int(params.get('fastPeriod', 10)),
+        slow_period=int(params.get('slowPeriod', 30))
+    ),
+}
+
+
+class EngineFactory:
+    """Creates ready-to-run BacktestEngine instances for one configuration"""
+
+    def __init__(
+        self,
+        strategy: str = 'smaCrossover',
+        parameters: Optional[Dict[str, Any]] = None,
+        initial_capital: float = 10000.0,
+        risk_params: Optional[Dict[str, Any]] = None,
+        use_kernel: Optional[bool] = None,
+        verbose: bool = False
+    ):
+        """
+        Initialize engine factory
+
+        Args:
+            strategy: Strategy name as sent by the frontend (e.g. 'smaCrossover')
+            parameters: Strategy parameters (e.g. {'fastPeriod': 10, 'slowPeriod': 30})
+            initial_capital: Starting capital
+            risk_params: Risk management parameters (frontend `riskManagement`)
+            use_kernel: Passed to BacktestEngine (None = automatic)
+            verbose: Passed to BacktestEngine
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}; expected one of {sorted(STRATEGIES)}")
+
+        self.strategy_name = strategy
+        self.parameters = dict(parameters or {})
+        self.initial_capital = initial_capital
+        self.risk_params = dict(risk_params or {})
+        self.use_kernel = use_kernel
+        self.verbose = verbose
+
+        self._build_strategy = STRATEGIES[strategy]
+        # Fail at factory construction, not on the request path
+        self._build_strategy(self.parameters)
+
+    @classmethod
+    def from_request(cls, payload: Dict[str, Any], **kwargs) -> 'EngineFactory':
+        """Create a factory from a /api/backtest request body"""
+        return cls(
+            strategy=payload.get('strategy', 'smaCrossover'),
+            parameters=payload.get('parameters'),
+            initial_capital=payload.get('initialCapital', 10000.0),
+            risk_params=payload.get('riskManagement'),
+            **kwargs
+        )
+
+    def create(self) -> BacktestEngine:
+        """Create a fresh engine (engines hold per-run state; don't reuse them)"""
+        return BacktestEngine(
+            strategy=self._build_strategy(self.parameters),
+            initial_capital=self.initial_capital,
+            risk_params=self.risk_params,
+            use_kernel=self.use_kernel,
+            verbose=self.verbose
+        )
+
+    def warm(self, kernel: Optional[bool] = None) -> 'EngineFactory':
+        """
+        Exercise the request path once before serving
+
+        Args:
+            kernel: Also compile the Numba kernel. None compiles it only if
+                this factory could use it (Numba installed, kernel not disabled)
+
+        Returns:
+            self, so `EngineFactory(...).warm()` can be chained
+        """
+        if kernel is None:
+            kernel = engine_kernel.HAVE_NUMBA and self.use_kernel is not False
+        if kernel:
+            engine_kernel.warm_up()
+
+        bars = [Bar(date=f'2000-01-{day:02d}', open=100.0, high=101.0, low=99.0, close=100.0 + day % 3)
+                for day in range(1, 29)]
+        engine = self.create()
+        engine.verbose = False
+        engine.run(bars)
+        return self
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+    from backtest_engine_example import generate_sample_data
+
+    payload = {
+        'strategy': 'smaCrossover',
+        'initialCapital': 10000,
+        'parameters': {'fastPeriod': 10, 'slowPeriod': 30},
+        'riskManagement': {'commission': 0.50, 'slippage': 0.05, 'stopLoss': 2.0, 'takeProfit': 5.0},
+    }
+
+    start = time.perf_counter()
+    factory = EngineFactory.from_request(payload).warm(kernel=False)
+    print(f"Factory ready in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    bars = generate_sample_data(days=252, seed=1)
+    start = time.perf_counter()
+    results = factory.create().run(bars)
+    print(f"First request: {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"{results['backtest']['performance'].get('totalTrades', 0)} trades")
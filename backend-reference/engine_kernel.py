@@ -0,0 +1,546 @@
+"""
+Compiled Bar-Loop Kernel for Backtester Pro
+===========================================
+
+Array-based implementation of the BacktestEngine bar loop for the built-in
+SMAStrategy and RiskManager semantics:
+- SMA crossover signals (same window sums as SMAStrategy.calculate_sma)
+- Commission and slippage on entry and exit
+- Stop Loss / Take Profit exits (stop loss has priority)
+- Position sizing and maximum concurrent positions
+- Equity curve and drawdown
+
+When Numba is installed the kernel is JIT-compiled; otherwise it is plain
+Python. Every floating point operation is performed in the same order as the
+reference path (BacktestEngine + RiskManager), so trades and equity are
+bit-identical. BacktestEngine selects this path automatically when Numba is
+available, the strategy is an SMAStrategy and the series is long enough to
+pay for importing Numba (KERNEL_MIN_BARS) or the kernel is already loaded.
+Share counts are int64 in the kernel; if a position would need 2**63 shares
+or more, the kernel stops and BacktestEngine reruns the series on the
+reference loop instead of returning wrapped values.
+
+Usage:
+    engine = BacktestEngine(strategy=SMAStrategy(10, 30), risk_params=risk_params)
+    results = engine.run(historical_data)       # kernel used if numba present
+
+    engine_kernel.warm_up()                      # at worker start: pre-compile
+
+    engine = BacktestEngine(..., use_kernel=False)  # force reference path
+
+    # Verify parity on random data
+    python engine_kernel.py
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+import importlib.util
+import types
+
+# numpy/numba cost ~350ms to import, more than a whole small daily backtest,
+# so they are only imported when the compiled kernel is actually used.
+HAVE_NUMBA = (
+    importlib.util.find_spec('numba') is not None
+    and importlib.util.find_spec('numpy') is not None
+)
+
+# Below this many bars the reference loop finishes before numba would even
+# be imported; BacktestEngine only auto-selects the kernel above it (or once
+# the kernel has been loaded, e.g. by warm_up()).
+KERNEL_MIN_BARS = 20000
+
+np = None
+njit = None
+_compiled_kernel = None
+
+
+# Exit reason codes used in the kernel output
+REASON_STRATEGY = 0
+REASON_STOP_LOSS = 1
+REASON_TAKE_PROFIT = 2
+REASON_END_OF_BACKTEST = 3
+
+EXIT_REASONS = ('strategy', 'stop_loss', 'take_profit', 'end_of_backtest')
+
+# Indexes into the `state` buffer
+STATE_CAPITAL = 0
+STATE_TOTAL_COMMISSION = 1
+STATE_TOTAL_SLIPPAGE = 2
+STATE_STOP_LOSS_EXITS = 3
+STATE_TAKE_PROFIT_EXITS = 4
+STATE_TRADE_COUNT = 5
+STATE_SHARES_OVERFLOW = 6
+
+# int64 share counts must stay below this; Python ints in the reference path don't
+MAX_SHARES = 2.0 ** 63
+
+
+class SharesOverflowError(OverflowError):
+    """Position size no longer fits the kernel's int64 share counts"""
+
+
+def _sma(close, period, end_index):
+    if end_index < period - 1:
+        return 0.0
+    total = 0.0
+    for k in range(end_index - period + 1, end_index + 1):
+        total += close[k]
+    return total / period
+
+
+def _close_slot(
+    slot, exit_price_raw, exit_index, reason,
+    commission, has_slippage, slippage_mult,
+    pos_entry, pos_shares, pos_commission, pos_slippage, pos_entry_index,
+    state,
+    trade_entry_index, trade_exit_index, trade_entry_price, trade_exit_price,
+    trade_shares, trade_commission, trade_slippage, trade_pnl, trade_pnl_pct,
+    trade_reason
+):
+    """RiskManager.close_position + BacktestEngine._close_position"""
+    entry = pos_entry[slot]
+    shares = pos_shares[slot]
+
+    if has_slippage:
+        exit_price = exit_price_raw * (1 - slippage_mult)
+    else:
+        exit_price = exit_price_raw
+    exit_slippage = abs(exit_price - exit_price_raw) * shares
+
+    commission_paid = pos_commission[slot] + commission
+    slippage_cost = pos_slippage[slot] + exit_slippage
+
+    gross_pnl = (exit_price - entry) * shares
+    pnl = gross_pnl - commission_paid - slippage_cost
+    pnl_pct = (pnl / (entry * shares)) * 100
+
+    state[STATE_TOTAL_COMMISSION] += commission
+    state[STATE_TOTAL_SLIPPAGE] += exit_slippage
+    state[STATE_CAPITAL] += pnl + (entry * shares)
+
+    t = int(state[STATE_TRADE_COUNT])
+    trade_entry_index[t] = pos_entry_index[slot]
+    trade_exit_index[t] = exit_index
+    trade_entry_price[t] = entry
+    trade_exit_price[t] = exit_price
+    trade_shares[t] = shares
+    trade_commission[t] = commission_paid
+    trade_slippage[t] = slippage_cost
+    trade_pnl[t] = pnl
+    trade_pnl_pct[t] = pnl_pct
+    trade_reason[t] = reason
+    state[STATE_TRADE_COUNT] = t + 1
+
+
+def _compact(count, keep, pos_entry, pos_shares, pos_sl, pos_tp,
+             pos_commission, pos_slippage, pos_entry_index):
+    """Drop closed slots while preserving open-position order"""
+    out = 0
+    for j in range(count):
+        if keep[j]:
+            if out != j:
+                pos_entry[out] = pos_entry[j]
+                pos_shares[out] = pos_shares[j]
+                pos_sl[out] = pos_sl[j]
+                pos_tp[out] = pos_tp[j]
+                pos_commission[out] = pos_commission[j]
+                pos_slippage[out] = pos_slippage[j]
+                pos_entry_index[out] = pos_entry_index[j]
+            out += 1
+    return out
+
+
+def sma_backtest_kernel(
+    high, low, close,
+    fast_period, slow_period,
+    commission, has_slippage, slippage_mult,
+    has_stop_loss, stop_loss_pct, has_take_profit, take_profit_pct,
+    position_size_pct, max_positions,
+    state,
+    pos_entry, pos_shares, pos_sl, pos_tp, pos_commission, pos_slippage,
+    pos_entry_index, keep,
+    equity, drawdown,
+    trade_entry_index, trade_exit_index, trade_entry_price, trade_exit_price,
+    trade_shares, trade_commission, trade_slippage, trade_pnl, trade_pnl_pct,
+    trade_reason
+):
+    """
+    Run the SMA crossover backtest over OHLC arrays
+
+    All buffers are preallocated by the caller (numpy arrays for the
+    compiled kernel, lists for the interpreted one). `state` carries the
+    capital and RiskManager statistics in and out.
+    """
+    n = len(close)
+    count = 0
+    peak = 0.0
+
+    for i in range(n):
+        # 1. Risk management exits (RiskManager.check_exit, SL before TP)
+        if count > 0:
+            any_closed = False
+            for j in range(count):
+                keep[j] = True
+                if has_stop_loss and low[i] <= pos_sl[j]:
+                    state[STATE_STOP_LOSS_EXITS] += 1
+                    reason = REASON_STOP_LOSS
+                    exit_price = pos_sl[j]
+                elif has_take_profit and high[i] >= pos_tp[j]:
+                    state[STATE_TAKE_PROFIT_EXITS] += 1
+                    reason = REASON_TAKE_PROFIT
+                    exit_price = pos_tp[j]
+                else:
+                    continue
+                _close_slot(
+                    j, exit_price, i, reason,
+                    commission, has_slippage, slippage_mult,
+                    pos_entry, pos_shares, pos_commission, pos_slippage, pos_entry_index,
+                    state,
+                    trade_entry_index, trade_exit_index, trade_entry_price, trade_exit_price,
+                    trade_shares, trade_commission, trade_slippage, trade_pnl, trade_pnl_pct,
+                    trade_reason
+                )
+                keep[j] = False
+                any_closed = True
+            if any_closed:
+                count = _compact(count, keep, pos_entry, pos_shares, pos_sl, pos_tp,
+                                 pos_commission, pos_slippage, pos_entry_index)
+
+        # 2. Strategy signal (SMAStrategy.generate_signal)
+        signal = 0
+        if i >= slow_period:
+            fast_sma = _sma(close, fast_period, i)
+            slow_sma = _sma(close, slow_period, i)
+            prev_fast_sma = _sma(close, fast_period, i - 1)
+            prev_slow_sma = _sma(close, slow_period, i - 1)
+            if prev_fast_sma <= prev_slow_sma and fast_sma > slow_sma:
+                signal = 1
+            elif prev_fast_sma >= prev_slow_sma and fast_sma < slow_sma:
+                signal = -1
+
+        # 3. Process signal
+        if signal == 1 and count < max_positions:
+            price = close[i]
+            capital_per_position = state[STATE_CAPITAL] * (position_size_pct / 100.0)
+            if max_positions > 1:
+                capital_per_position /= max_positions
+            raw_shares = capital_per_position / price
+            if not -MAX_SHARES < raw_shares < MAX_SHARES:
+                # int() would wrap (or fail on inf/nan); let the caller rerun
+                # on the reference loop, which uses unbounded ints
+                state[STATE_SHARES_OVERFLOW] = 1.0
+                return
+            shares = int(raw_shares)
+
+            if shares != 0:
+                if has_slippage:
+                    entry = price * (1 + slippage_mult)
+                else:
+                    entry = price
+                slippage_cost = abs(entry - price) * shares
+
+                pos_entry[count] = entry
+                pos_shares[count] = shares
+                pos_sl[count] = entry * (1 - stop_loss_pct / 100.0) if has_stop_loss else 0.0
+                pos_tp[count] = entry * (1 + take_profit_pct / 100.0) if has_take_profit else 0.0
+                pos_commission[count] = commission
+                pos_slippage[count] = slippage_cost
+                pos_entry_index[count] = i
+                count += 1
+
+                state[STATE_TOTAL_COMMISSION] += commission
+                state[STATE_TOTAL_SLIPPAGE] += slippage_cost
+                state[STATE_CAPITAL] -= commission
+
+        elif signal == -1:
+            for j in range(count):
+                _close_slot(
+                    j, close[i], i, REASON_STRATEGY,
+                    commission, has_slippage, slippage_mult,
+                    pos_entry, pos_shares, pos_commission, pos_slippage, pos_entry_index,
+                    state,
+                    trade_entry_index, trade_exit_index, trade_entry_price, trade_exit_price,
+                    trade_shares, trade_commission, trade_slippage, trade_pnl, trade_pnl_pct,
+                    trade_reason
+                )
+            count = 0
+
+        # 4. Equity curve (BacktestEngine._update_equity_curve)
+        unrealized_pnl = 0.0
+        for j in range(count):
+            unrealized_pnl += (close[i] - pos_entry[j]) * pos_shares[j]
+        total_equity = state[STATE_CAPITAL] + unrealized_pnl
+
+        if i == 0 or peak == 0:
+            drawdown[i] = 0.0
+        else:
+            drawdown[i] = (total_equity - peak) / peak
+        equity[i] = total_equity
+        if i == 0 or total_equity > peak:
+            peak = total_equity
+
+    # Close any remaining open positions at the last close
+    for j in range(count):
+        _close_slot(
+            j, close[n - 1], n - 1, REASON_END_OF_BACKTEST,
+            commission, has_slippage, slippage_mult,
+            pos_entry, pos_shares, pos_commission, pos_slippage, pos_entry_index,
+            state,
+            trade_entry_index, trade_exit_index, trade_entry_price, trade_exit_price,
+            trade_shares, trade_commission, trade_slippage, trade_pnl, trade_pnl_pct,
+            trade_reason
+        )
+
+
+def _compile_kernel():
+    """
+    JIT-compile the kernel and its helpers
+
+    The helpers are rebound into a separate namespace so the compiled kernel
+    calls compiled helpers while the interpreted kernel keeps calling the
+    plain Python ones.
+    """
+    namespace = dict(globals())
+
+    def rebind(fn):
+        return types.FunctionType(fn.__code__, namespace, fn.__name__, fn.__defaults__)
+
+    # nogil: batch.py runs kernels for different specs on a thread pool
+    for name in ('_sma', '_close_slot', '_compact'):
+        namespace[name] = njit(cache=True, nogil=True)(rebind(globals()[name]))
+    return njit(cache=True, nogil=True)(rebind(sma_backtest_kernel))
+
+
+def is_loaded() -> bool:
+    """Whether the compiled kernel has already been imported and built"""
+    return _compiled_kernel is not None
+
+
+def get_compiled_kernel():
+    """Import numpy/numba and build the compiled kernel on first use"""
+    global np, njit, _compiled_kernel
+
+    if _compiled_kernel is None:
+        if not HAVE_NUMBA:
+            raise RuntimeError("Numba is not installed; use compiled=False")
+        import numpy
+        import numba
+        np, njit = numpy, numba.njit
+        _compiled_kernel = _compile_kernel()
+    return _compiled_kernel
+
+
+def warm_up() -> None:
+    """
+    Load and compile the kernel ahead of the first request
+
+    Compiled code is cached on disk (cache=True), so after the first
+    process this mostly costs the numba import.
+    """
+    from risk_management import RiskManager
+
+    bars = [types.SimpleNamespace(high=1.0, low=1.0, close=1.0)] * 4
+    run_sma_kernel(bars, 1, 2, RiskManager(stop_loss=1.0, take_profit=1.0), 1000.0)
+
+
+def _column(bars: Sequence[Any], name: str, compiled: bool):
+    """Extract an OHLC column, zero-copy for BarSeriesView/MarketData inputs"""
+    column = getattr(bars, name, None)
+
+    if not compiled:
+        # The interpreted kernel indexes anything: ndarrays and memoryviews as-is
+        if isinstance(column, memoryview) or hasattr(column, 'dtype'):
+            return column
+        return [float(getattr(bar, name)) for bar in bars]
+
+    if isinstance(column, np.ndarray) and column.dtype == np.float64:
+        return column
+    if isinstance(column, memoryview):
+        return np.frombuffer(column, dtype=np.float64)
+    return np.array([getattr(bar, name) for bar in bars], dtype=np.float64)
+
+
+def run_sma_kernel(
+    bars: Sequence[Any],
+    fast_period: int,
+    slow_period: int,
+    risk_manager: Any,
+    capital: float,
+    compiled: bool = True
+) -> Tuple[Dict[str, Any], List[float], List[float], List[Dict[str, Any]]]:
+    """
+    Run the kernel over a bar series
+
+    Args:
+        bars: List of Bar objects (or a BarSeriesView)
+        fast_period: SMAStrategy fast period
+        slow_period: SMAStrategy slow period
+        risk_manager: RiskManager providing the risk parameters
+        capital: Starting capital
+        compiled: Use the Numba kernel (requires HAVE_NUMBA)
+
+    Returns:
+        (state, equity, drawdown, trades) where state holds the final capital
+        and RiskManager statistics and trades are raw per-trade fields
+
+    Raises:
+        SharesOverflowError: A position size reached 2**63 shares (capital
+            compounded far beyond any real account); nothing is returned,
+            so the caller can rerun the series on the reference loop
+    """
+    n = len(bars)
+    rm = risk_manager
+    slots = max(rm.max_positions, 1)
+
+    if compiled:
+        kernel = get_compiled_kernel()
+
+        def floats(size):
+            return np.zeros(size, dtype=np.float64)
+
+        def ints(size):
+            return np.zeros(size, dtype=np.int64)
+
+        keep = np.zeros(slots, dtype=np.bool_)
+    else:
+        kernel = sma_backtest_kernel
+
+        def floats(size):
+            return [0.0] * size
+
+        def ints(size):
+            return [0] * size
+
+        keep = [False] * slots
+
+    high, low, close = (_column(bars, name, compiled) for name in ('high', 'low', 'close'))
+
+    state = floats(7)
+    state[STATE_CAPITAL] = capital
+    state[STATE_TOTAL_COMMISSION] = rm.total_commission_paid
+    state[STATE_TOTAL_SLIPPAGE] = rm.total_slippage_cost
+
+    equity, drawdown = floats(n), floats(n)
+    trade_buffers = (
+        ints(n), ints(n), floats(n), floats(n), ints(n),
+        floats(n), floats(n), floats(n), floats(n), ints(n)
+    )
+
+    kernel(
+        high, low, close,
+        fast_period, slow_period,
+        float(rm.commission), rm.slippage != 0, rm.slippage / 100.0,
+        rm.stop_loss_pct is not None, float(rm.stop_loss_pct or 0.0),
+        rm.take_profit_pct is not None, float(rm.take_profit_pct or 0.0),
+        float(rm.position_size_pct), rm.max_positions,
+        state,
+        floats(slots), ints(slots), floats(slots), floats(slots),
+        floats(slots), floats(slots), ints(slots), keep,
+        equity, drawdown,
+        *trade_buffers
+    )
+    if state[STATE_SHARES_OVERFLOW]:
+        raise SharesOverflowError(
+            f"Share count exceeds int64 (capital {float(state[STATE_CAPITAL]):.6g})"
+        )
+
+    (entry_index, exit_index, entry_price, exit_price, shares,
+     commission_paid, slippage_cost, pnl, pnl_pct, reason) = trade_buffers
+    trades = [
+        {
+            'entry_index': int(entry_index[t]),
+            'exit_index': int(exit_index[t]),
+            'entry_price': float(entry_price[t]),
+            'exit_price': float(exit_price[t]),
+            'shares': int(shares[t]),
+            'commission_paid': float(commission_paid[t]),
+            'slippage_cost': float(slippage_cost[t]),
+            'pnl': float(pnl[t]),
+            'pnl_percent': float(pnl_pct[t]),
+            'exit_reason': EXIT_REASONS[int(reason[t])],
+        }
+        for t in range(int(state[STATE_TRADE_COUNT]))
+    ]
+
+    final_state = {
+        'capital': float(state[STATE_CAPITAL]),
+        'total_commission_paid': float(state[STATE_TOTAL_COMMISSION]),
+        'total_slippage_cost': float(state[STATE_TOTAL_SLIPPAGE]),
+        'stop_loss_exits': int(state[STATE_STOP_LOSS_EXITS]),
+        'take_profit_exits': int(state[STATE_TAKE_PROFIT_EXITS]),
+    }
+
+    return final_state, [float(e) for e in equity], [float(d) for d in drawdown], trades
+
+
+def check_parity(bars: Sequence[Any], fast_period: int, slow_period: int,
+                 risk_params: Dict[str, Any], initial_capital: float = 10000.0) -> bool:
+    """
+    Run the reference and kernel paths on the same data and compare
+
+    Returns:
+        True if trades, equity curve and risk statistics are bit-identical
+    """
+    from backtest_engine_example import BacktestEngine, SMAStrategy
+
+    def run(use_kernel):
+        engine = BacktestEngine(
+            strategy=SMAStrategy(fast_period, slow_period),
+            initial_capital=initial_capital,
+            risk_params=risk_params,
+            use_kernel=use_kernel,
+            verbose=False
+        )
+        engine.run(bars)
+        return engine
+
+    reference = run(False)
+    fast = run(True)
+
+    return (
+        reference.closed_trades == fast.closed_trades
+        and reference.equity_curve == fast.equity_curve
+        and reference.capital == fast.capital
+        and reference.risk_manager.get_statistics() == fast.risk_manager.get_statistics()
+        and reference.risk_manager.total_commission_paid == fast.risk_manager.total_commission_paid
+        and reference.risk_manager.total_slippage_cost == fast.risk_manager.total_slippage_cost
+    )
+
+
+# Example usage
+if __name__ == "__main__":
+    import random
+    import time
+    from backtest_engine_example import BacktestEngine, SMAStrategy, generate_sample_data
+
+    print(f"Numba available: {HAVE_NUMBA}")
+
+    scenarios = [
+        (10, 30, {}),
+        (10, 30, {'commission': 0.50, 'slippage': 0.05, 'stopLoss': 2.0, 'takeProfit': 5.0}),
+        (5, 20, {'commission': 1.0, 'slippage': 0.1, 'stopLoss': 1.0, 'positionSize': 50}),
+        (5, 20, {'takeProfit': 1.5, 'maxPositions': 3, 'positionSize': 90}),
+        (3, 8, {'commission': 0.25, 'stopLoss': 0.5, 'takeProfit': 0.5, 'maxPositions': 5}),
+    ]
+
+    random.seed(7)
+    failures = 0
+    for seed in range(5):
+        bars = generate_sample_data(days=500)
+        for fast, slow, risk_params in scenarios:
+            if not check_parity(bars, fast, slow, risk_params):
+                failures += 1
+                print(f"  MISMATCH: data #{seed}, SMA({fast},{slow}), {risk_params}")
+    print(f"Parity: {len(scenarios) * 5 - failures}/{len(scenarios) * 5} scenarios bit-identical")
+
+    bars = generate_sample_data(days=5000)
+    for use_kernel in (False, True):
+        engine = BacktestEngine(SMAStrategy(10, 30), risk_params=scenarios[1][2],
+                                use_kernel=use_kernel, verbose=False)
+        if use_kernel and HAVE_NUMBA:
+            engine.run(bars[:100])  # JIT warm-up
+            engine = BacktestEngine(SMAStrategy(10, 30), risk_params=scenarios[1][2],
+                                    use_kernel=use_kernel, verbose=False)
+        start = time.perf_counter()
+        engine.run(bars)
+        elapsed = time.perf_counter() - start
+        print(f"  {'kernel' if use_kernel else 'reference'}: {len(bars)} bars in {elapsed * 1000:.1f} ms")
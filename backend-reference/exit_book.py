@@ -0,0 +1,197 @@
+"""
+Price-Indexed Exit Book for Backtester Pro
+==========================================
+
+Keeps the Stop Loss / Take Profit levels of open positions in heaps keyed by
+trigger price, so each bar only touches positions whose level lies within
+the bar's [low, high] range. With hundreds of open positions (pyramiding,
+multi-lot strategies) a quiet bar costs O(1) instead of one
+RiskManager.check_exit call per position.
+
+Trigger rules (same as RiskManager.check_stop_loss / check_take_profit):
+- Long stop loss:    low  <= stop_loss_price    (max-heap on stop)
+- Long take profit:  high >= take_profit_price  (min-heap on target)
+- Short stop loss:   high >= stop_loss_price    (min-heap on stop)
+- Short take profit: low  <= take_profit_price  (max-heap on target)
+
+The book only finds candidates. Callers still run RiskManager.check_exit on
+each one (in the order positions were added), so the stop-loss-before-
+take-profit priority, exit prices and exit statistics are unchanged.
+
+Usage:
+    book = ExitBook()
+    book.add(position)
+
+    # On each bar
+    for position in book.pop_triggered(bar):
+        should_exit, exit_price, reason = risk_manager.check_exit(position, bar)
+
+    # Position closed for another reason (e.g. strategy exit)
+    book.discard(position)
+"""
+
+from typing import Dict, List, Tuple
+import heapq
+
+from risk_management import Bar, Position
+
+
+class ExitBook:
+    """Open positions indexed by Stop Loss / Take Profit trigger price"""
+
+    def __init__(self):
+        # Heap entries are (key, seq); max-heaps store the negated price.
+        # Removed positions are dropped lazily when their entries surface.
+        self._long_stops: List[Tuple[float, int]] = []
+        self._long_targets: List[Tuple[float, int]] = []
+        self._short_stops: List[Tuple[float, int]] = []
+        self._short_targets: List[Tuple[float, int]] = []
+
+        self._positions: Dict[int, Position] = {}  # seq -> position
+        self._seq_by_id: Dict[int, int] = {}       # id(position) -> seq
+        self._next_seq = 0
+        self._entries = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def add(self, position: Position) -> None:
+        """Index an open position by its exit levels"""
+        seq = self._next_seq
+        self._next_seq += 1
+        self._positions[seq] = position
+        self._seq_by_id[id(position)] = seq
+
+        if position.side == 'long':
+            if position.stop_loss_price is not None:
+                heapq.heappush(self._long_stops, (-position.stop_loss_price, seq))
+                self._entries += 1
+            if position.take_profit_price is not None:
+                heapq.heappush(self._long_targets, (position.take_profit_price, seq))
+                self._entries += 1
+        else:
+            if position.stop_loss_price is not None:
+                heapq.heappush(self._short_stops, (position.stop_loss_price, seq))
+                self._entries += 1
+            if position.take_profit_price is not None:
+                heapq.heappush(self._short_targets, (-position.take_profit_price, seq))
+                self._entries += 1
+
+    def discard(self, position: Position) -> None:
+        """Forget a position (no-op if it is not in the book)"""
+        seq = self._seq_by_id.pop(id(position), None)
+        if seq is not None:
+            del self._positions[seq]
+            self._maybe_compact()
+
+    def pop_triggered(self, bar: Bar) -> List[Position]:
+        """
+        Remove and return positions with a level inside the bar's range
+
+        Returns:
+            Positions whose Stop Loss or Take Profit the bar reaches, in the
+            order they were added to the book
+        """
+        if not self._positions:
+            return []
+
+        # Every heap is keyed so that "reached" means key <= limit. If no
+        # heap's top is reached, nothing is (stale tops can wait): the common
+        # quiet bar returns without building anything
+        low, high = -bar.low, bar.high
+        long_stops, long_targets = self._long_stops, self._long_targets
+        short_stops, short_targets = self._short_stops, self._short_targets
+        if not (
+            (long_stops and long_stops[0][0] <= low)
+            or (long_targets and long_targets[0][0] <= high)
+            or (short_stops and short_stops[0][0] <= high)
+            or (short_targets and short_targets[0][0] <= low)
+        ):
+            return []
+
+        hits = set()
+        self._pop(self._long_stops, -bar.low, hits)
+        self._pop(self._long_targets, bar.high, hits)
+        self._pop(self._short_stops, bar.high, hits)
+        self._pop(self._short_targets, -bar.low, hits)
+        if not hits:
+            return []
+
+        triggered = []
+        for seq in sorted(hits):
+            position = self._positions.pop(seq)
+            del self._seq_by_id[id(position)]
+            triggered.append(position)
+        return triggered
+
+    def _pop(self, heap: List[Tuple[float, int]], limit: float, hits: set) -> None:
+        positions = self._positions
+        while heap and (heap[0][0] <= limit or heap[0][1] not in positions):
+            _, seq = heapq.heappop(heap)
+            self._entries -= 1
+            if seq in positions:
+                hits.add(seq)
+
+    def _maybe_compact(self) -> None:
+        """Rebuild the heaps when stale entries dominate (bounds memory)"""
+        # Each live position has at most two entries
+        if self._entries <= 4 * len(self._positions) + 64:
+            return
+
+        positions = self._positions
+        for heap in (self._long_stops, self._long_targets, self._short_stops, self._short_targets):
+            heap[:] = [entry for entry in heap if entry[1] in positions]
+            heapq.heapify(heap)
+        self._entries = sum(len(heap) for heap in (
+            self._long_stops, self._long_targets, self._short_stops, self._short_targets
+        ))
+
+
+# Example usage
+if __name__ == "__main__":
+    import random
+    import time
+    from risk_management import RiskManager
+
+    risk_mgr = RiskManager(stop_loss=2.0, take_profit=5.0, max_positions=1000)
+    rng = random.Random(1)
+
+    positions = []
+    for i in range(500):
+        price = 100 + rng.uniform(-5, 5)
+        side = 'long' if i % 2 == 0 else 'short'
+        positions.append(risk_mgr.open_position(price, 1_000_000, '2024-01-01', side=side))
+
+    book = ExitBook()
+    for position in positions:
+        book.add(position)
+
+    bars = []
+    price = 100.0
+    for day in range(200):
+        price += rng.uniform(-0.3, 0.3)
+        bars.append(Bar(f'day{day}', price, price + 0.2, price - 0.2, price))
+
+    # Linear scan (what BacktestEngine._check_exits used to do)
+    checker = RiskManager(stop_loss=2.0, take_profit=5.0)
+    open_positions = list(positions)
+    start = time.perf_counter()
+    scan_exits = []
+    for bar in bars:
+        for position in open_positions[:]:
+            if checker.check_exit(position, bar)[0]:
+                open_positions.remove(position)
+                scan_exits.append((bar.date, id(position)))
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    book_exits = []
+    for bar in bars:
+        for position in book.pop_triggered(bar):
+            book_exits.append((bar.date, id(position)))
+    book_time = time.perf_counter() - start
+
+    print(f"500 open positions, {len(bars)} bars:")
+    print(f"  Linear scan: {scan_time * 1000:.1f} ms, {len(scan_exits)} exits")
+    print(f"  Exit book:   {book_time * 1000:.1f} ms, {len(book_exits)} exits")
+    print(f"  Same exits in same order: {scan_exits == book_exits}")
@@ -0,0 +1,399 @@
+"""
+Indicator Library for Backtester Pro
+====================================
+
+Reusable technical indicators with a shared, bounded computation cache.
+Results are memoized per (series fingerprint, indicator, params), so when an
+optimizer sweep runs 200 SMA configurations over the same series, SMA(20) is
+computed once per process instead of once per strategy.
+
+Indicators:
+- sma: Simple Moving Average (same window sums as SMAStrategy.calculate_sma)
+- ema: Exponential Moving Average (seeded with the SMA of the first window)
+- rsi: Relative Strength Index (Wilder smoothing)
+- atr: Average True Range (Wilder smoothing)
+- bollinger: Bollinger Bands (middle, upper, lower)
+- macd: MACD line, signal line and histogram
+
+Every indicator returns an array('d') aligned with the input series;
+positions before the indicator has enough data are NaN. Arrays are shared
+between callers through the cache, so treat them as read-only. Storing raw
+float64 (8 bytes per bar rather than a boxed float) and bounding the cache by
+total elements keeps a worker's footprint fixed however long the series are.
+
+Usage:
+    from indicators import PriceSeries, sma, rsi, get_cache
+
+    series = PriceSeries.from_bars(bars)   # fingerprints computed once
+    fast = sma(series, 10)
+    slow = sma(series, 30)                 # cache hit for every later caller
+    print(get_cache().get_statistics())
+"""
+
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+import hashlib
+import math
+import threading
+
+
+Values = array  # array('d'), NaN where not yet defined
+
+# Default cache budget: 4M float64 values (32 MB) per process
+DEFAULT_MAX_ELEMENTS = 4_000_000
+
+
+def _nan_values(n: int) -> Values:
+    return array('d', [math.nan]) * n
+
+
+def _element_count(value: Any) -> int:
+    """Number of float64 values held by a cached indicator output"""
+    if isinstance(value, tuple):
+        return sum(_element_count(item) for item in value)
+    return len(value)
+
+
+class PriceSeries:
+    """
+    Close (and optionally high/low) columns with content fingerprints
+
+    Fingerprints hash the raw float64 bytes of each column, so two series
+    with the same prices share cache entries even if they are different
+    objects, and close-only indicators are shared with series that also
+    carry high/low.
+    """
+
+    def __init__(
+        self,
+        close: Sequence[float],
+        high: Optional[Sequence[float]] = None,
+        low: Optional[Sequence[float]] = None
+    ):
+        self.close = close
+        self.high = high
+        self.low = low
+        self._fingerprints: Dict[Tuple[str, ...], str] = {}
+
+    @classmethod
+    def from_bars(cls, bars: Sequence[Any], columns: Sequence[str] = ('close', 'high', 'low')) -> 'PriceSeries':
+        """Build from a List[Bar] (or a columnar series such as BarSeriesView/MarketData)"""
+        data = {}
+        for name in columns:
+            column = getattr(bars, name, None)
+            if column is not None and not callable(column):
+                data[name] = column.tolist() if hasattr(column, 'tolist') else list(column)
+            else:
+                data[name] = [getattr(bar, name) for bar in bars]
+        return cls(**data)
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def fingerprint(self, columns: Tuple[str, ...] = ('close',)) -> str:
+        """Content hash of the given columns (computed once per column set)"""
+        if columns not in self._fingerprints:
+            digest = hashlib.blake2b(digest_size=16)
+            for name in columns:
+                column = getattr(self, name)
+                if column is None:
+                    raise ValueError(f"Series has no {name} column")
+                digest.update(name.encode('ascii'))
+                digest.update(array('d', column).tobytes())
+            self._fingerprints[columns] = digest.hexdigest()
+        return self._fingerprints[columns]
+
+
+class IndicatorCache:
+    """
+    Bounded LRU cache of indicator outputs shared within a process
+
+    Bounded both by entry count and by the total number of float64 values
+    held, so long series evict sooner. An output larger than the whole budget
+    is returned without being stored; max_elements=0 disables caching.
+
+    Thread-safe: sweep tasks running on a thread pool can share one cache.
+    Values are computed outside the lock; two threads missing on the same
+    key at once may both compute it, which is harmless.
+    """
+
+    def __init__(self, maxsize: int = 1024, max_elements: int = DEFAULT_MAX_ELEMENTS):
+        """
+        Initialize indicator cache
+
+        Args:
+            maxsize: Maximum number of indicator series kept
+            max_elements: Maximum float64 values kept across all entries
+                (8 bytes each)
+        """
+        self.maxsize = maxsize
+        self.max_elements = max_elements
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._elements = 0
+        self._lock = threading.Lock()
+
+        # Statistics tracking
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        size = _element_count(value)
+        if size > self.max_elements:
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self._elements -= self._sizes[key]
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._elements += size
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize or self._elements > self.max_elements:
+                evicted, _ = self._entries.popitem(last=False)
+                self._elements -= self._sizes.pop(evicted)
+                self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._elements = 0
+
+    def get_statistics(self) -> dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with cache stats
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'maxSize': self.maxsize,
+                'elements': self._elements,
+                'maxElements': self.max_elements,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions
+            }
+
+
+_default_cache = IndicatorCache()
+
+
+def get_cache() -> IndicatorCache:
+    """Process-wide cache used when no cache is passed explicitly"""
+    return _default_cache
+
+
+CLOSE = ('close',)
+OHLC = ('close', 'high', 'low')
+
+
+def _cached(series: PriceSeries, name: str, params: Tuple, compute: Callable[[], Values],
+            cache: Optional[IndicatorCache], columns: Tuple[str, ...] = CLOSE) -> Any:
+    cache = cache if cache is not None else _default_cache
+    return cache.get_or_compute((series.fingerprint(columns), name, params), compute)
+
+
+# ---------------------------------------------------------------------------
+# Raw computations (uncached) on plain value sequences
+# ---------------------------------------------------------------------------
+
+def _sma_values(values: Sequence[float], period: int) -> Values:
+    # Window sums (not a running sum) so results are bit-identical to
+    # SMAStrategy.calculate_sma and the compiled kernel
+    n = len(values)
+    out = _nan_values(n)
+    for i in range(period - 1, n):
+        out[i] = sum(values[i - period + 1:i + 1]) / period
+    return out
+
+
+def _ema_values(values: Sequence[float], period: int) -> Values:
+    """EMA over the non-NaN tail of values, seeded with the first window's SMA"""
+    n = len(values)
+    out = _nan_values(n)
+    start = next((i for i, v in enumerate(values) if not math.isnan(v)), n)
+    if n - start < period:
+        return out
+
+    alpha = 2.0 / (period + 1)
+    seed_index = start + period - 1
+    ema = sum(values[start:seed_index + 1]) / period
+    out[seed_index] = ema
+    for i in range(seed_index + 1, n):
+        ema = alpha * values[i] + (1 - alpha) * ema
+        out[i] = ema
+    return out
+
+
+def _wilder(values: Sequence[float], period: int, first: int) -> Values:
+    """Wilder smoothing of values[first:], seeded with their first-window mean"""
+    n = len(values)
+    out = _nan_values(n)
+    seed_index = first + period - 1
+    if seed_index >= n:
+        return out
+
+    avg = sum(values[first:seed_index + 1]) / period
+    out[seed_index] = avg
+    for i in range(seed_index + 1, n):
+        avg = (avg * (period - 1) + values[i]) / period
+        out[i] = avg
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Public indicators
+# ---------------------------------------------------------------------------
+
+def _check_period(period: int) -> None:
+    if period < 1:
+        raise ValueError(f"Indicator period must be >= 1, got {period}")
+
+
+def sma(series: PriceSeries, period: int, cache: Optional[IndicatorCache] = None) -> Values:
+    """Simple Moving Average of close"""
+    _check_period(period)
+    return _cached(series, 'sma', (period,), lambda: _sma_values(series.close, period), cache)
+
+
+def ema(series: PriceSeries, period: int, cache: Optional[IndicatorCache] = None) -> Values:
+    """Exponential Moving Average of close"""
+    _check_period(period)
+    return _cached(series, 'ema', (period,), lambda: _ema_values(series.close, period), cache)
+
+
+def rsi(series: PriceSeries, period: int = 14, cache: Optional[IndicatorCache] = None) -> Values:
+    """Relative Strength Index of close (0-100)"""
+    _check_period(period)
+
+    def compute() -> Values:
+        close = series.close
+        gains = [0.0] + [max(close[i] - close[i - 1], 0.0) for i in range(1, len(close))]
+        losses = [0.0] + [max(close[i - 1] - close[i], 0.0) for i in range(1, len(close))]
+        avg_gain = _wilder(gains, period, 1)
+        avg_loss = _wilder(losses, period, 1)
+
+        out = _nan_values(len(close))
+        for i, (gain, loss) in enumerate(zip(avg_gain, avg_loss)):
+            if math.isnan(gain):
+                continue
+            elif loss == 0:
+                out[i] = 100.0 if gain > 0 else 50.0
+            else:
+                out[i] = 100.0 - 100.0 / (1.0 + gain / loss)
+        return out
+
+    return _cached(series, 'rsi', (period,), compute, cache)
+
+
+def atr(series: PriceSeries, period: int = 14, cache: Optional[IndicatorCache] = None) -> Values:
+    """Average True Range (requires high and low)"""
+    _check_period(period)
+    if series.high is None or series.low is None:
+        raise ValueError("ATR requires high and low columns")
+
+    def compute() -> Values:
+        high, low, close = series.high, series.low, series.close
+        true_range = [high[0] - low[0]] + [
+            max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+            for i in range(1, len(close))
+        ]
+        return _wilder(true_range, period, 0)
+
+    return _cached(series, 'atr', (period,), compute, cache, columns=OHLC)
+
+
+def bollinger(
+    series: PriceSeries,
+    period: int = 20,
+    num_std: float = 2.0,
+    cache: Optional[IndicatorCache] = None
+) -> Tuple[Values, Values, Values]:
+    """Bollinger Bands: (middle, upper, lower) using population std of close"""
+    _check_period(period)
+
+    def compute() -> Tuple[Values, Values, Values]:
+        close = series.close
+        middle = sma(series, period, cache)
+        upper, lower = _nan_values(len(close)), _nan_values(len(close))
+        for i in range(period - 1, len(close)):
+            mean = middle[i]
+            variance = sum((c - mean) ** 2 for c in close[i - period + 1:i + 1]) / period
+            width = num_std * math.sqrt(variance)
+            upper[i] = mean + width
+            lower[i] = mean - width
+        return middle, upper, lower
+
+    return _cached(series, 'bollinger', (period, float(num_std)), compute, cache)
+
+
+def macd(
+    series: PriceSeries,
+    fast_period: int = 12,
+    slow_period: int = 26,
+    signal_period: int = 9,
+    cache: Optional[IndicatorCache] = None
+) -> Tuple[Values, Values, Values]:
+    """MACD: (macd line, signal line, histogram)"""
+    for period in (fast_period, slow_period, signal_period):
+        _check_period(period)
+
+    def compute() -> Tuple[Values, Values, Values]:
+        fast = ema(series, fast_period, cache)
+        slow = ema(series, slow_period, cache)
+        # NaN propagates through the differences before either EMA is defined
+        line = array('d', [f - s for f, s in zip(fast, slow)])
+        signal = _ema_values(line, signal_period)
+        histogram = array('d', [m - s for m, s in zip(line, signal)])
+        return line, signal, histogram
+
+    return _cached(series, 'macd', (fast_period, slow_period, signal_period), compute, cache)
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+    from backtest_engine_example import BacktestEngine, SMAStrategy, generate_sample_data
+
+    bars = generate_sample_data(days=2000, seed=1)
+    series = PriceSeries.from_bars(bars)
+
+    print("Latest values:")
+    print(f"  SMA(20):  {sma(series, 20)[-1]:.2f}")
+    print(f"  EMA(20):  {ema(series, 20)[-1]:.2f}")
+    print(f"  RSI(14):  {rsi(series, 14)[-1]:.2f}")
+    print(f"  ATR(14):  {atr(series, 14)[-1]:.2f}")
+    middle, upper, lower = bollinger(series, 20)
+    print(f"  BB(20,2): {lower[-1]:.2f} / {middle[-1]:.2f} / {upper[-1]:.2f}")
+    line, signal, histogram = macd(series)
+    print(f"  MACD:     {line[-1]:.3f} signal {signal[-1]:.3f} hist {histogram[-1]:.3f}")
+
+    # 200-configuration sweep sharing the cache. Import the module by name:
+    # when run as a script this file is __main__, a separate module object.
+    import indicators
+    shared = indicators.get_cache()
+    grid = [(fast, slow) for fast in range(5, 25) for slow in range(30, 130, 10)]
+    start = time.perf_counter()
+    for fast, slow in grid:
+        BacktestEngine(SMAStrategy(fast, slow), use_kernel=False, verbose=False).run(bars)
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(grid)}-config sweep on {len(bars)} bars: {elapsed:.2f} s")
+    print(f"Cache: {shared.get_statistics()}")
@@ -0,0 +1,339 @@
+"""
+Backtest Results Store for Backtester Pro
+=========================================
+
+Persistent, indexed storage for BacktestEngine results on embedded SQLite:
+- Performance metrics in typed, indexed columns
+- Trades and equity curves as zlib-compressed JSON blobs (loaded on demand)
+- Unique ids (see backtest_engine_example.new_backtest_id)
+- Bulk insert for optimizer/sweep outputs in a single transaction
+- Leaderboard queries answered from indexes, e.g.
+  "top 50 by Sharpe where maxDrawdown > -0.2"
+
+Usage:
+    from results_store import ResultsStore
+
+    store = ResultsStore('backtests.db')
+    store.insert(results, request=payload)         # one engine.run() result
+    store.insert_many([(results, payload), ...])   # sweep output
+
+    top = store.top('sharpeRatio', limit=50, where={'maxDrawdown': ('>', -0.2)})
+    full = store.get(top[0]['id'])                 # includes trades + equityCurve
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import sqlite3
+import threading
+import zlib
+
+
+# performance field (API name) -> (column, SQL type)
+METRIC_COLUMNS: Dict[str, Tuple[str, str]] = {
+    'totalReturn': ('total_return', 'REAL'),
+    'cagr': ('cagr', 'REAL'),
+    'sharpeRatio': ('sharpe_ratio', 'REAL'),
+    'maxDrawdown': ('max_drawdown', 'REAL'),
+    'winRate': ('win_rate', 'REAL'),
+    'profitFactor': ('profit_factor', 'REAL'),
+    'totalTrades': ('total_trades', 'INTEGER'),
+    'winningTrades': ('winning_trades', 'INTEGER'),
+    'losingTrades': ('losing_trades', 'INTEGER'),
+    'avgWin': ('avg_win', 'REAL'),
+    'avgLoss': ('avg_loss', 'REAL'),
+    'expectancy': ('expectancy', 'REAL'),
+    'totalCommissions': ('total_commissions', 'REAL'),
+    'totalSlippageCost': ('total_slippage_cost', 'REAL'),
+    'stopLossTrades': ('stop_loss_trades', 'INTEGER'),
+    'takeProfitTrades': ('take_profit_trades', 'INTEGER'),
+}
+
+# request field (API name) -> column
+REQUEST_COLUMNS: Dict[str, str] = {
+    'strategy': 'strategy',
+    'symbol': 'symbol',
+    'timeframe': 'timeframe',
+    'startDate': 'start_date',
+    'endDate': 'end_date',
+    'initialCapital': 'initial_capital',
+}
+
+# Metrics leaderboards sort or filter on
+INDEXED_METRICS = ('totalReturn', 'cagr', 'sharpeRatio', 'maxDrawdown', 'winRate', 'profitFactor')
+
+OPERATORS = ('=', '!=', '<', '<=', '>', '>=')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backtests (
+    id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    strategy TEXT,
+    symbol TEXT,
+    timeframe TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    initial_capital REAL,
+    parameters TEXT,
+    risk_management TEXT,
+    {metric_columns},
+    trades BLOB,
+    equity_curve BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_backtests_created_at ON backtests (created_at);
+CREATE INDEX IF NOT EXISTS idx_backtests_symbol_strategy ON backtests (symbol, strategy);
+{metric_indexes}
+""".format(
+    metric_columns=',\n    '.join(f'{column} {sql_type}' for column, sql_type in METRIC_COLUMNS.values()),
+    metric_indexes='\n'.join(
+        f'CREATE INDEX IF NOT EXISTS idx_backtests_{METRIC_COLUMNS[m][0]} ON backtests ({METRIC_COLUMNS[m][0]});'
+        for m in INDEXED_METRICS
+    )
+)
+
+SUMMARY_COLUMNS = (['id', 'created_at'] + list(REQUEST_COLUMNS.values()) + ['parameters', 'risk_management']
+                   + [c for c, _ in METRIC_COLUMNS.values()])
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def _unpack(blob: Optional[bytes]) -> Any:
+    return json.loads(zlib.decompress(blob).decode('utf-8')) if blob is not None else None
+
+
+class ResultsStore:
+    """SQLite-backed store of backtest results with indexed metrics"""
+
+    def __init__(self, path: str = 'backtests.db'):
+        """
+        Initialize results store
+
+        Args:
+            path: SQLite database file (':memory:' for a throwaway store)
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock:
+            if path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+                self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _row(self, results: Dict[str, Any], request: Optional[Dict[str, Any]]) -> Tuple:
+        backtest = results['backtest']
+        performance = backtest.get('performance') or {}
+        request = request or {}
+
+        return (
+            backtest['id'],
+            backtest.get('createdAt'),
+            *(request.get(field) for field in REQUEST_COLUMNS),
+            json.dumps(request.get('parameters')) if request.get('parameters') is not None else None,
+            json.dumps(request.get('riskManagement')) if request.get('riskManagement') is not None else None,
+            *(performance.get(metric) for metric in METRIC_COLUMNS),
+            _pack(backtest.get('trades', [])),
+            _pack(backtest.get('equityCurve', [])),
+        )
+
+    def _insert_sql(self) -> str:
+        columns = (['id', 'created_at'] + list(REQUEST_COLUMNS.values()) + ['parameters', 'risk_management']
+                   + [c for c, _ in METRIC_COLUMNS.values()] + ['trades', 'equity_curve'])
+        return f"INSERT INTO backtests ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+    def insert(self, results: Dict[str, Any], request: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Store one BacktestEngine.run() result
+
+        Args:
+            results: Dict returned by BacktestEngine.run
+            request: Optional /api/backtest payload (symbol, strategy, parameters...)
+
+        Returns:
+            The backtest id
+        """
+        self.insert_many([(results, request)])
+        return results['backtest']['id']
+
+    def insert_many(self, items: Iterable[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]) -> int:
+        """
+        Bulk-insert (results, request) pairs in one transaction
+
+        Returns:
+            Number of rows inserted
+        """
+        rows = [self._row(results, request) for results, request in items]
+        with self._lock, self._conn:
+            self._conn.executemany(self._insert_sql(), rows)
+        return len(rows)
+
+    def get(self, backtest_id: str) -> Optional[Dict[str, Any]]:
+        """Full result in API format (including trades and equityCurve), or None"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM backtests WHERE id = ?', (backtest_id,)).fetchone()
+        if row is None:
+            return None
+
+        summary = self._summary(row)
+        return {
+            'backtest': {
+                'id': summary['id'],
+                'performance': summary['performance'],
+                'trades': _unpack(row['trades']),
+                'equityCurve': _unpack(row['equity_curve']),
+                'createdAt': summary['createdAt']
+            },
+            'request': summary['request']
+        }
+
+    def _summary(self, row: sqlite3.Row) -> Dict[str, Any]:
+        request = {field: row[column] for field, column in REQUEST_COLUMNS.items() if row[column] is not None}
+        if row['parameters'] is not None:
+            request['parameters'] = json.loads(row['parameters'])
+        if row['risk_management'] is not None:
+            request['riskManagement'] = json.loads(row['risk_management'])
+        return {
+            'id': row['id'],
+            'createdAt': row['created_at'],
+            'request': request,
+            'performance': {
+                metric: row[column]
+                for metric, (column, _) in METRIC_COLUMNS.items()
+                if row[column] is not None
+            }
+        }
+
+    def _query(
+        self,
+        where: Optional[Dict[str, Tuple[str, Any]]],
+        filters: Dict[str, Any]
+    ) -> Tuple[List[str], List[Any]]:
+        clauses, params = [], []
+        for metric, (op, value) in (where or {}).items():
+            if metric not in METRIC_COLUMNS:
+                raise ValueError(f"Unknown metric {metric!r}")
+            if op not in OPERATORS:
+                raise ValueError(f"Unsupported operator {op!r}; expected one of {OPERATORS}")
+            clauses.append(f'{METRIC_COLUMNS[metric][0]} {op} ?')
+            params.append(value)
+        for field, value in filters.items():
+            if value is not None:
+                clauses.append(f'{REQUEST_COLUMNS[field]} = ?')
+                params.append(value)
+        return clauses, params
+
+    def _top_sql(
+        self,
+        metric: str,
+        limit: int,
+        where: Optional[Dict[str, Tuple[str, Any]]],
+        ascending: bool,
+        filters: Dict[str, Any]
+    ) -> Tuple[str, List[Any]]:
+        if metric not in METRIC_COLUMNS:
+            raise ValueError(f"Unknown metric {metric!r}")
+        column = METRIC_COLUMNS[metric][0]
+        clauses, params = self._query(where, filters)
+        clauses.insert(0, f'{column} IS NOT NULL')
+
+        sql = (f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM backtests "
+               f"WHERE {' AND '.join(clauses)} "
+               f"ORDER BY {column} {'ASC' if ascending else 'DESC'} LIMIT ?")
+        return sql, params + [int(limit)]
+
+    def top(
+        self,
+        metric: str = 'sharpeRatio',
+        limit: int = 50,
+        where: Optional[Dict[str, Tuple[str, Any]]] = None,
+        ascending: bool = False,
+        symbol: Optional[str] = None,
+        strategy: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Leaderboard query (summaries only; blobs are not read)
+
+        Args:
+            metric: Performance field to sort by (e.g. 'sharpeRatio')
+            limit: Maximum rows
+            where: Metric filters, e.g. {'maxDrawdown': ('>', -0.2)}
+            ascending: Sort ascending instead of descending
+            symbol: Only this symbol
+            strategy: Only this strategy
+
+        Returns:
+            List of {'id', 'createdAt', 'request', 'performance'} dicts
+        """
+        sql, params = self._top_sql(metric, limit, where, ascending, {'symbol': symbol, 'strategy': strategy})
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def explain_top(self, metric: str = 'sharpeRatio', limit: int = 50,
+                    where: Optional[Dict[str, Tuple[str, Any]]] = None, **filters) -> List[str]:
+        """SQLite query plan for a top() call (to confirm an index is used)"""
+        sql, params = self._top_sql(metric, limit, where, False, filters)
+        with self._lock:
+            return [row[-1] for row in self._conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+
+    def count(self, where: Optional[Dict[str, Tuple[str, Any]]] = None, **filters) -> int:
+        """Number of stored backtests matching the filters"""
+        clauses, params = self._query(where, filters)
+        sql = 'SELECT COUNT(*) FROM backtests' + (f" WHERE {' AND '.join(clauses)}" if clauses else '')
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """Delete backtests by id; returns rows deleted"""
+        with self._lock, self._conn:
+            cursor = self._conn.executemany('DELETE FROM backtests WHERE id = ?', [(i,) for i in ids])
+        return cursor.rowcount
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+    from backtest_engine_example import BacktestEngine, SMAStrategy
+    from market_data import generate_market_data
+
+    store = ResultsStore(':memory:')
+    bars = generate_market_data('regime_switching', n_bars=500, seed=3).to_bars()
+
+    # A small sweep, stored in one transaction
+    items = []
+    for fast in range(5, 25):
+        for slow in range(30, 80, 5):
+            for stop_loss in (1.0, 2.0, 4.0):
+                request = {
+                    'strategy': 'smaCrossover', 'symbol': 'DEMO', 'timeframe': 'day',
+                    'parameters': {'fastPeriod': fast, 'slowPeriod': slow},
+                    'riskManagement': {'stopLoss': stop_loss},
+                }
+                engine = BacktestEngine(SMAStrategy(fast, slow), risk_params=request['riskManagement'],
+                                        verbose=False)
+                items.append((engine.run(bars), request))
+
+    start = time.perf_counter()
+    store.insert_many(items)
+    print(f"Inserted {len(items)} backtests in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    where = {'maxDrawdown': ('>', -0.2)}
+    start = time.perf_counter()
+    top = store.top('sharpeRatio', limit=50, where=where)
+    print(f"Top 50 by Sharpe with maxDrawdown > -20%: {len(top)} rows "
+          f"in {(time.perf_counter() - start) * 1000:.2f} ms")
+    print(f"  Plan: {store.explain_top('sharpeRatio', 50, where)}")
+
+    best = top[0]
+    print(f"  Best: {best['request']['parameters']} {best['request']['riskManagement']} "
+          f"sharpe={best['performance']['sharpeRatio']}")
+    full = store.get(best['id'])
+    print(f"  Loaded {len(full['backtest']['trades'])} trades, "
+          f"{len(full['backtest']['equityCurve'])} equity points")